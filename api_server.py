@@ -1,53 +1,175 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
-from redshift_financial_agent import RedshiftFinancialAgent
+from redshift_financial_agent import RedshiftFinancialAgent, REPORT_SECTIONS
+from query_builder import FILTER_PARAMS, normalize_filters
+from response_cache import ResponseCache
+from cache_warmer import CacheWarmer
+from insight_jobs import InsightJobQueue
+from http_cache import PreparedResponse
+import os
 import threading
-from datetime import datetime, timedelta
+from urllib.parse import urlencode
 
 app = Flask(__name__)
 CORS(app)
 
-# Global cache and agent instance
-cache = {'report': None, 'predictions': None, 'timestamp': None}
-cache_lock = threading.Lock()
+# Per-key response cache (own TTL, single-flight, stale-while-revalidate) and agent instance
+cache = ResponseCache()
+insight_jobs = InsightJobQueue()
+agent_lock = threading.Lock()
 agent_instance = None
 
 def get_agent():
     global agent_instance
-    if agent_instance is None:
-        agent_instance = RedshiftFinancialAgent()
+    with agent_lock:
+        if agent_instance is None:
+            agent_instance = RedshiftFinancialAgent()
     return agent_instance
 
-def is_cache_valid():
-    if cache['timestamp'] is None:
-        return False
-    return datetime.now() - cache['timestamp'] < timedelta(minutes=5)
+def build_report():
+    """Report data right away; each AI insight is a background job referenced by ID"""
+    agent = get_agent()
+    report, analyses = agent.create_report_data()
+    ai_jobs = {}
+    for input_hash, keys, compute_fn in agent.insight_tasks(analyses):
+        job_id = insight_jobs.submit(input_hash, compute_fn)
+        ai_jobs.update({key: job_id for key in keys})
+    return dict(report, ai_jobs=ai_jobs)
+
+def prepare_report():
+    """Prepared report that keeps its insight job IDs alongside the body"""
+    report = build_report()
+    return PreparedResponse(app.json.dumps(report), meta={'ai_jobs': report['ai_jobs']})
+
+def report_fingerprint():
+    """Data fingerprint, or None (forcing a rebuild that resubmits them) while a job
+    linked from the report being served has failed"""
+    served = cache.peek('report')
+    if served is None:
+        return None
+    for job_id in set(served.meta.get('ai_jobs', {}).values()):
+        job = insight_jobs.get(job_id)
+        if job is None or job['status'] == 'error':
+            return None
+    return get_agent().data_fingerprint()
+
+def build_predictions():
+    return get_agent().generate_comprehensive_predictions()
+
+def prepared(build_fn):
+    """Serialize, hash and compress a payload once per cache fill instead of per request"""
+    return lambda: PreparedResponse(app.json.dumps(build_fn()))
+
+def cached_response(key, prepare_fn):
+    """Cached payload with ETag/304 handling and Cache-Control from the entry's remaining TTL"""
+    return cache.get(key, prepare_fn).to_response(cache.remaining_ttl(key))
+
+# Refresh both artifacts ahead of expiry; skip when the underlying data is unchanged
+warmer = CacheWarmer(cache)
+warmer.register('report', prepare_report, fingerprint_fn=report_fingerprint)
+warmer.register('predictions', prepared(build_predictions),
+                fingerprint_fn=lambda: get_agent().data_fingerprint(get_agent().prediction_queries))
 
 @app.route('/api/report', methods=['GET'])
 def get_financial_report():
     try:
-        with cache_lock:
-            if cache['report'] is None or not is_cache_valid():
-                agent = get_agent()
-                cache['report'] = agent.create_comprehensive_report()
-                cache['timestamp'] = datetime.now()
-        return jsonify(cache['report'])
+        return cached_response('report', prepare_report)
     except Exception as e:
         print(f"Error generating report: {e}")
         return jsonify({'error': str(e)}), 500
 
+def section_request(section, args):
+    """Cache key and builder for a section request; ValueError on bad parameters
+
+    Supports fields=a,b, limit=N and the query filters (start_date, end_date,
+    region, category, granularity); region and category may repeat.
+    """
+    unknown = set(args) - set(FILTER_PARAMS) - {'fields', 'limit'}
+    if unknown:
+        raise ValueError(f"Unsupported query parameters: {', '.join(sorted(unknown))}")
+
+    filters = {}
+    for name in FILTER_PARAMS:
+        values = args.getlist(name)
+        if values:
+            filters[name] = values if name in ('region', 'category') else values[-1]
+    normalize_filters(filters)
+
+    fields = [name.strip() for name in args.get('fields', '').split(',') if name.strip()] or None
+    limit = args.get('limit')
+    if limit is not None:
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = int(limit)
+
+    # Equivalent requests share one cache entry regardless of parameter order
+    key = f"{section}?{urlencode(sorted((name, value) for name in args for value in args.getlist(name)))}"
+    return key, lambda: get_agent().get_section(section, filters, fields, limit)
+
+@app.route('/api/report/<section>', methods=['GET'])
+def get_report_section(section):
+    """One report section (data only, never waits on the LLM), or just the AI insights"""
+    if section == 'insights':
+        key, build_fn = 'insights', lambda: get_agent().generate_report_insights()
+    elif section in REPORT_SECTIONS:
+        try:
+            key, build_fn = section_request(section, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    else:
+        return jsonify({'error': f"Unknown section '{section}'",
+                        'sections': list(REPORT_SECTIONS) + ['insights']}), 404
+
+    try:
+        return cached_response(key, prepared(build_fn))
+    except ValueError as e:
+        # e.g. a fields= name the section doesn't have
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error generating {section} section: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/predictions', methods=['GET'])
 def get_predictions():
     try:
-        with cache_lock:
-            if cache['predictions'] is None or not is_cache_valid():
-                agent = get_agent()
-                cache['predictions'] = agent.generate_comprehensive_predictions()
-                cache['timestamp'] = datetime.now()
-        return jsonify(cache['predictions'])
+        return cached_response('predictions', prepared(build_predictions))
     except Exception as e:
         print(f"Error generating predictions: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Insight job status and result; ?wait=N long-polls up to N seconds for completion"""
+    try:
+        wait = min(float(request.args.get('wait', 0)), float(os.getenv('API_JOB_MAX_WAIT', '30')))
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    job = insight_jobs.wait(job_id, wait) if wait > 0 else insight_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f"Unknown or expired job '{job_id}'"}), 404
+    return jsonify(job)
+
+@app.route('/api/cache/status', methods=['GET'])
+def get_cache_status():
+    return jsonify(dict(cache.stats(), prewarm=warmer.status(), insight_jobs=insight_jobs.stats(), pid=os.getpid()))
+
+def start_background():
+    """Start pre-warming; with a shared cache only one worker process refreshes"""
+    if os.getenv('API_PREWARM', 'true').lower() == 'true':
+        warmer.start()
+
+def shutdown():
+    """Stop background work and release Redshift connections and cache handles"""
+    warmer.stop()
+    cache.close()
+    insight_jobs.close()
+    if agent_instance is not None:
+        agent_instance.close()
+
+# Production: gunicorn -c gunicorn.conf.py api_server:app
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    debug = os.getenv('API_DEBUG', 'true').lower() == 'true'
+    # With the debug reloader, only the serving child process runs the warmer
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background()
+    app.run(debug=debug, port=5000)
@@ -0,0 +1,185 @@
+import os
+import asyncio
+from datetime import datetime
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from openai import AsyncOpenAI
+
+from redshift_financial_agent import RedshiftFinancialAgent
+
+
+class AsyncRedshiftFinancialAgent:
+    """Asyncio front end for RedshiftFinancialAgent
+
+    Redshift work (pooled psycopg2 connections, forecasting) runs on a bounded
+    executor sized to the connection pool and LLM calls use the async OpenAI
+    client, so one event loop can serve many concurrent reports. Caches, the
+    connection pool and the circuit breaker are shared with the wrapped
+    synchronous agent, which keeps working unchanged for scripts.
+    """
+
+    def __init__(self, name="RedshiftAnalyst", agent=None):
+        self.agent = agent or RedshiftFinancialAgent(name)
+        self.name = self.agent.name
+        self.client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+
+        # One worker per pooled connection; extra queries queue in the executor
+        self.db_executor = ThreadPoolExecutor(
+            max_workers=self.agent.pool.max_size, thread_name_prefix='redshift-async'
+        )
+        self._llm_semaphores = {}
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.db_executor, partial(fn, *args, **kwargs))
+
+    def _llm_semaphore(self):
+        # Semaphores bind to the loop that first uses them
+        loop = asyncio.get_running_loop()
+        if loop not in self._llm_semaphores:
+            self._llm_semaphores[loop] = asyncio.Semaphore(self.agent.llm_concurrency)
+        return self._llm_semaphores[loop]
+
+    async def execute_query(self, query_name, **kwargs):
+        """Async execute_query; accepts the same keyword arguments (except stream)"""
+        if kwargs.get('stream'):
+            raise ValueError("Streaming is not supported on the async agent; use the sync stream_query")
+        return await self._run_blocking(self.agent.execute_query, query_name, **kwargs)
+
+    async def execute_queries(self, query_names, columnar=False):
+        """Execute independent queries concurrently, returning results in request order"""
+        results = await asyncio.gather(
+            *(self.execute_query(name, columnar=columnar) for name in query_names),
+            return_exceptions=True
+        )
+        section_data = {}
+        for name, result in zip(query_names, results):
+            if isinstance(result, Exception):
+                print(f"❌ Query {name} failed: {result}")
+                result = self.agent._mock_result(name, columnar)
+            section_data[name] = result
+        return section_data
+
+    async def generate_ai_analysis(self, data, analysis_type):
+        """Generate AI-powered financial analysis"""
+        return await self._complete(*self.agent._analysis_request(data, analysis_type))
+
+    async def _complete(self, model, system_prompt, prompt, max_tokens, with_model=False):
+        """Cached, rate-limited, deadline-bounded chat completion; with_model adds the model that answered"""
+        limiter = self.agent.rate_limiter
+        estimate = limiter.estimate_tokens(system_prompt, prompt, max_tokens=max_tokens)
+
+        async def request(model, timeout):
+            async with self._llm_semaphore():
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    timeout=timeout
+                )
+            usage = getattr(response, 'usage', None)
+            return response.choices[0].message.content, getattr(usage, 'total_tokens', 0)
+
+        return await self.agent.llm_cache.aget_or_compute(
+            model, system_prompt, prompt, max_tokens,
+            lambda: self.agent.llm_caller.acall(request, model, limiter=limiter, estimate=estimate),
+            with_model=with_model
+        )
+
+    async def generate_ai_analyses(self, analyses, timeout=None):
+        """Run independent AI analyses concurrently, keeping partial results on timeout"""
+        timeout = self.agent.llm_timeout if timeout is None else timeout
+
+        async def analyse(key, data, analysis_type):
+            try:
+                return await asyncio.wait_for(self.generate_ai_analysis(data, analysis_type), timeout)
+            except asyncio.TimeoutError:
+                print(f"⚠️ AI analysis '{key}' timed out after {timeout:.0f}s")
+                return f"AI analysis unavailable: timed out after {timeout:.0f} seconds."
+            except Exception as e:
+                print(f"❌ AI analysis '{key}' failed: {e}")
+                return f"AI analysis unavailable: {e}"
+
+        results = await asyncio.gather(
+            *(analyse(key, data, analysis_type) for key, (data, analysis_type) in analyses.items())
+        )
+        return dict(zip(analyses, results))
+
+    async def generate_combined_analyses(self, analyses, timeout=None):
+        """All analyses from one structured request, falling back to per-section calls"""
+        model, system_prompt, prompt, max_tokens = self.agent._combined_request(analyses)
+        try:
+            text, answered_by = await self._complete(model, system_prompt, prompt, max_tokens, with_model=True)
+        except Exception as e:
+            print(f"❌ Combined AI analysis failed: {e}")
+            return {key: f"AI analysis unavailable: {e}" for key in analyses}
+
+        try:
+            return self.agent._parse_combined(text, list(analyses))
+        except ValueError as e:
+            cache = self.agent.llm_cache
+            await asyncio.to_thread(cache.invalidate, cache.make_key(answered_by, system_prompt, prompt, max_tokens))
+            print(f"⚠️ Combined AI response unusable ({e}); falling back to per-section analyses")
+            return await self.generate_ai_analyses(analyses, timeout)
+
+    async def generate_predictions(self, data_type='revenue'):
+        """Generate predictive analysis using machine learning"""
+        return await self._run_blocking(self.agent.generate_predictions, data_type)
+
+    async def generate_comprehensive_predictions(self):
+        """Generate comprehensive predictive analysis"""
+        print(f"\n{'='*80}")
+        print("PREDICTIVE FINANCIAL ANALYSIS")
+        print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"{'='*80}")
+
+        data_types = ('revenue', 'expenses', 'customers')
+        forecasts = await asyncio.gather(*(self.generate_predictions(data_type) for data_type in data_types))
+        prediction_summary = dict(zip(('revenue_forecast', 'expense_forecast', 'customer_forecast'), forecasts))
+
+        ai_prediction_insights = await self.generate_ai_analysis(prediction_summary, "predictive analysis")
+
+        return dict(prediction_summary, ai_insights=ai_prediction_insights,
+                    generated_at=datetime.now().isoformat())
+
+    async def create_comprehensive_report(self):
+        """Generate comprehensive financial report from Redshift data"""
+        print(f"\n{'='*80}")
+        print("COMPREHENSIVE FINANCIAL ANALYSIS REPORT")
+        print(f"Generated by: {self.name} | Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"{'='*80}")
+
+        section_data = await self.execute_queries(self.agent.report_queries, columnar=True)
+        report, analyses = self.agent._prepare_report(section_data)
+        if self.agent.combined_insights:
+            ai_insights = await self.generate_combined_analyses(analyses)
+        else:
+            ai_insights = await self.generate_ai_analyses(analyses)
+        return self.agent._complete_report(report, ai_insights)
+
+    async def close(self):
+        """Close the async client, executor and pooled Redshift connections"""
+        await self.client.close()
+        self.db_executor.shutdown(wait=False)
+        self.agent.close()
+
+
+# Usage example
+if __name__ == "__main__":
+    async def main():
+        agent = AsyncRedshiftFinancialAgent()
+        try:
+            # Reports and predictions are generated concurrently on one event loop
+            report, predictions = await asyncio.gather(
+                agent.create_comprehensive_report(),
+                agent.generate_comprehensive_predictions()
+            )
+        finally:
+            await agent.close()
+        print(f"\n{'='*80}")
+        print("Report generation completed successfully!")
+
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+import os
+import csv
+import gzip
+import time
+import uuid
+import tempfile
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.extras import execute_values
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+
+class BulkLoader:
+    """Fast table loads: multi-row INSERT batches, or staged S3 COPY when configured"""
+
+    def __init__(self, connect_fn, batch_size=None, commit_rows=None, max_workers=4,
+                 s3_prefix=None, iam_role=None):
+        self.connect_fn = connect_fn
+        # Rows per multi-row VALUES statement
+        self.batch_size = batch_size or int(os.getenv('BULK_INSERT_BATCH_SIZE', '1000'))
+        # Rows per transaction
+        self.commit_rows = commit_rows or int(os.getenv('BULK_COMMIT_ROWS', '50000'))
+        self.max_workers = max_workers
+        self.s3_prefix = s3_prefix or os.getenv('REDSHIFT_COPY_S3_PREFIX')
+        self.iam_role = iam_role or os.getenv('REDSHIFT_COPY_IAM_ROLE')
+
+    @property
+    def copy_enabled(self):
+        return bool(self.s3_prefix and self.iam_role and boto3 is not None)
+
+    def load_tables(self, tables):
+        """Load several tables in parallel: {table: (columns, rows)} -> {table: stats}"""
+        results = {}
+        workers = max(1, min(self.max_workers, len(tables)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-load') as executor:
+            futures = {
+                table: executor.submit(self.load_table, table, columns, rows)
+                for table, (columns, rows) in tables.items()
+            }
+            for table, future in futures.items():
+                results[table] = future.result()
+        return results
+
+    def load_table(self, table, columns, rows):
+        """Load rows (any iterable of tuples) into one table and report throughput"""
+        start = time.time()
+        stats = {'table': table, 'rows': 0, 'seconds': 0.0, 'rows_per_second': 0.0,
+                 'method': 'copy' if self.copy_enabled else 'insert', 'success': False, 'error': None}
+
+        conn = self.connect_fn()
+        if not conn:
+            stats['error'] = 'connection failed'
+            return stats
+
+        try:
+            if self.copy_enabled:
+                stats['rows'] = self._copy_via_s3(conn, table, columns, rows)
+            else:
+                stats['rows'] = self._insert_batches(conn, table, columns, rows)
+            stats['success'] = True
+        except Exception as e:
+            conn.rollback()
+            stats['error'] = str(e)
+            print(f"❌ Error loading {table}: {e}")
+        finally:
+            conn.close()
+
+        stats['seconds'] = time.time() - start
+        if stats['seconds'] > 0:
+            stats['rows_per_second'] = stats['rows'] / stats['seconds']
+        if stats['success']:
+            print(f"✅ Loaded {stats['rows']:,} rows into {table} "
+                  f"({stats['rows_per_second']:,.0f} rows/s via {stats['method']})")
+        return stats
+
+    def _insert_batches(self, conn, table, columns, rows):
+        """Multi-row INSERT ... VALUES statements, committed every commit_rows rows"""
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s"
+        loaded = 0
+        rows = iter(rows)
+        with conn.cursor() as cursor:
+            while True:
+                chunk = list(islice(rows, self.commit_rows))
+                if not chunk:
+                    break
+                execute_values(cursor, sql, chunk, page_size=self.batch_size)
+                conn.commit()
+                loaded += len(chunk)
+        return loaded
+
+    def _copy_via_s3(self, conn, table, columns, rows):
+        """Stage gzipped CSV parts in S3 and load them with a single COPY"""
+        bucket, _, prefix = self.s3_prefix.replace('s3://', '', 1).partition('/')
+        run_prefix = f"{prefix.rstrip('/')}/{table}/{uuid.uuid4().hex}/".lstrip('/')
+        s3 = boto3.client('s3')
+
+        loaded = 0
+        part = 0
+        rows = iter(rows)
+        keys = []
+        try:
+            while True:
+                chunk = list(islice(rows, self.commit_rows))
+                if not chunk:
+                    break
+                with tempfile.NamedTemporaryFile(suffix='.csv.gz', delete=False) as tmp:
+                    path = tmp.name
+                try:
+                    with gzip.open(path, 'wt', newline='') as f:
+                        csv.writer(f).writerows(chunk)
+                    key = f"{run_prefix}part-{part:05d}.csv.gz"
+                    s3.upload_file(path, bucket, key)
+                    keys.append(key)
+                finally:
+                    os.remove(path)
+                loaded += len(chunk)
+                part += 1
+
+            if keys:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        f"COPY {table} ({', '.join(columns)}) FROM %s IAM_ROLE %s CSV GZIP",
+                        (f"s3://{bucket}/{run_prefix}", self.iam_role)
+                    )
+                conn.commit()
+        finally:
+            for key in keys:
+                s3.delete_object(Bucket=bucket, Key=key)
+        return loaded
@@ -0,0 +1,144 @@
+import os
+import time
+import random
+import threading
+
+from response_cache import RefreshSkipped
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class CacheWarmer:
+    """Refreshes ResponseCache keys on their own schedule so readers always hit
+
+    Each registered key gets a daemon thread that recomputes it every
+    interval seconds (default 80% of the cache TTL) with +/- jitter. When a
+    fingerprint_fn is given and its value hasn't changed since the last
+    refresh, the entry's TTL is restarted instead of recomputing, up to
+    max_skips times in a row.
+
+    When the cache is shared between worker processes, only the process
+    holding an flock on lock_path refreshes; the others take over if it exits.
+    """
+
+    def __init__(self, cache, jitter=None, max_skips=None, lock_path=None):
+        self.cache = cache
+        self.lock_path = lock_path or (f"{cache.path}.warmer.lock" if getattr(cache, 'path', None) else None)
+        self.jitter = jitter if jitter is not None else float(os.getenv('API_PREWARM_JITTER', '0.1'))
+        self.max_skips = max_skips if max_skips is not None else int(os.getenv('API_PREWARM_MAX_SKIPS', '5'))
+
+        self._jobs = {}
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._lock_file = None
+
+    def register(self, key, compute_fn, interval=None, fingerprint_fn=None):
+        """Schedule key to be recomputed by compute_fn every interval seconds"""
+        if interval is None:
+            interval = float(os.getenv('API_PREWARM_INTERVAL', '0')) or self.cache.ttl * 0.8
+        self._jobs[key] = {
+            'compute_fn': compute_fn,
+            'fingerprint_fn': fingerprint_fn,
+            'interval': interval,
+            'fingerprint': None,
+            'consecutive_skips': 0,
+            'status': {
+                'last_run': None,
+                'last_result': None,
+                'last_duration': None,
+                'last_error': None,
+                'next_run': None,
+                'refreshes': 0,
+                'skips': 0,
+                'errors': 0
+            }
+        }
+
+    def start(self):
+        """Warm every key now, then keep refreshing in the background"""
+        self._stop.clear()
+        for key in self._jobs:
+            thread = threading.Thread(target=self._loop, args=(key,), name=f'cache-warmer-{key}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"🔥 Cache warmer started for: {', '.join(self._jobs)}")
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        with self._lock:
+            if self._lock_file is not None:
+                # Closing releases the flock so another worker can take over
+                self._lock_file.close()
+                self._lock_file = None
+
+    def is_leader(self):
+        """True if this process should refresh (it holds, or just took, the warmer lock)"""
+        if self.lock_path is None or fcntl is None:
+            return True
+        with self._lock:
+            if self._lock_file is not None:
+                return True
+            lock_file = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+        print(f"🔥 Process {os.getpid()} is refreshing the shared cache")
+        return True
+
+    def _loop(self, key):
+        job = self._jobs[key]
+        while not self._stop.is_set():
+            if self.is_leader():
+                self.run_once(key)
+            delay = job['interval'] * random.uniform(1 - self.jitter, 1 + self.jitter)
+            with self._lock:
+                job['status']['next_run'] = time.time() + delay
+            self._stop.wait(delay)
+
+    def run_once(self, key):
+        """Refresh one key now, skipping the recompute when its inputs are unchanged"""
+        job = self._jobs[key]
+        start = time.time()
+        result, error = 'refreshed', None
+        try:
+            fingerprint = job['fingerprint_fn']() if job['fingerprint_fn'] else None
+            if (fingerprint is not None and fingerprint == job['fingerprint']
+                    and job['consecutive_skips'] < self.max_skips and self.cache.touch(key)):
+                job['consecutive_skips'] += 1
+                result = 'skipped'
+            else:
+                self.cache.refresh(key, job['compute_fn'])
+                job['fingerprint'] = fingerprint
+                job['consecutive_skips'] = 0
+        except RefreshSkipped:
+            # Joined a background refresh that another process is doing
+            result = 'skipped'
+        except Exception as e:
+            # Readers keep getting the previous value until a refresh succeeds
+            print(f"❌ Pre-warming '{key}' failed: {e}")
+            result, error = 'error', str(e)
+
+        with self._lock:
+            status = job['status']
+            status.update(last_run=start, last_result=result, last_duration=time.time() - start, last_error=error)
+            status[{'refreshed': 'refreshes', 'skipped': 'skips', 'error': 'errors'}[result]] += 1
+        return result
+
+    def status(self):
+        """Last run time, duration, outcome and error per key"""
+        with self._lock:
+            leader = self._lock_file is not None or self.lock_path is None or fcntl is None
+            return {
+                key: dict(job['status'], interval=job['interval'], leader=leader)
+                for key, job in self._jobs.items()
+            }
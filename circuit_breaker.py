@@ -0,0 +1,120 @@
+import time
+import random
+import threading
+
+from registry import Registry
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker that fails fast while a dependency is down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=15, max_reset_timeout=300, jitter=0.2):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.jitter = jitter
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._consecutive_opens = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+
+        self._stats = {
+            'successes': 0,
+            'failures': 0,
+            'short_circuited': 0,
+            'transitions': {self.CLOSED: 0, self.OPEN: 0, self.HALF_OPEN: 0},
+            'last_state_change': None
+        }
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now):
+        if self._state == self.OPEN and now >= self._open_until:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    def _transition(self, state):
+        if state == self._state:
+            return
+        print(f"🔌 Circuit '{self.name}': {self._state} -> {state}")
+        self._state = state
+        self._stats['transitions'][state] += 1
+        self._stats['last_state_change'] = time.time()
+
+    def _open(self, now):
+        # Each consecutive re-open doubles the wait, with jitter to spread probes
+        timeout = min(self.max_reset_timeout, self.reset_timeout * (2 ** self._consecutive_opens))
+        timeout *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        self._consecutive_opens += 1
+        self._open_until = now + timeout
+        self._transition(self.OPEN)
+
+    def allow_request(self):
+        """True if a call may proceed; half-open admits a single probe"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._stats['short_circuited'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self._failures = 0
+            self._consecutive_opens = 0
+            self._probe_in_flight = False
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            self._stats['failures'] += 1
+            self._failures += 1
+            state = self._current_state(now)
+            if state == self.OPEN:
+                # Late failure from a call admitted before the breaker opened
+                return
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._probe_in_flight = False
+                self._open(now)
+
+    def retry_after(self):
+        """Seconds until the breaker will admit a probe (0 if not open)"""
+        with self._lock:
+            if self._current_state(time.monotonic()) != self.OPEN:
+                return 0.0
+            return max(0.0, self._open_until - time.monotonic())
+
+    def stats(self):
+        """State and transition metrics"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            stats = dict(self._stats)
+            stats['transitions'] = dict(self._stats['transitions'])
+            stats['state'] = state
+            stats['consecutive_failures'] = self._failures
+            stats['retry_after'] = max(0.0, self._open_until - time.monotonic()) if state == self.OPEN else 0.0
+        return stats
+
+
+_breakers = Registry()
+
+
+def get_breaker(name, **kwargs):
+    """Process-wide breaker shared by every caller using the same name"""
+    return _breakers.get(name, lambda: CircuitBreaker(name, **kwargs))
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+
+class ColumnarResult:
+    """Compact query result: named NumPy column arrays of equal length"""
+
+    def __init__(self, columns):
+        self._columns = {}
+        length = None
+        for name, values in columns.items():
+            array = values if isinstance(values, np.ndarray) else np.asarray(values)
+            if length is None:
+                length = len(array)
+            elif len(array) != length:
+                raise ValueError(f"Column '{name}' has {len(array)} values, expected {length}")
+            self._columns[name] = array
+        self._length = length or 0
+
+    @classmethod
+    def from_records(cls, records, columns=None):
+        """Build from a list of row dicts"""
+        if not records:
+            return cls({name: np.array([]) for name in (columns or [])})
+        columns = columns or list(records[0].keys())
+        return cls({name: np.array([row.get(name) for row in records]) for name in columns})
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build from a DataFrame without copying its column buffers where possible"""
+        return cls({name: df[name].to_numpy() for name in df.columns})
+
+    @classmethod
+    def from_rows(cls, column_names, rows):
+        """Build from DB-API cursor rows (sequence of tuples)"""
+        if not rows:
+            return cls({name: np.array([]) for name in column_names})
+        return cls({name: np.array(values) for name, values in zip(column_names, zip(*rows))})
+
+    @property
+    def column_names(self):
+        return list(self._columns.keys())
+
+    @property
+    def columns(self):
+        return dict(self._columns)
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __getitem__(self, key):
+        """Column array by name, or a row-sliced ColumnarResult"""
+        if isinstance(key, str):
+            return self._columns[key]
+        if isinstance(key, slice):
+            return ColumnarResult({name: values[key] for name, values in self._columns.items()})
+        raise TypeError("ColumnarResult indices must be column names or slices")
+
+    def __iter__(self):
+        """Iterate rows as dicts (convenience for small results)"""
+        return iter(self.to_records())
+
+    def sum(self, name):
+        """Column total as a plain Python number"""
+        total = self._columns[name].sum() if self._length else 0
+        return total.item() if isinstance(total, np.generic) else total
+
+    def to_frame(self):
+        """DataFrame view over the column arrays (no copy)"""
+        return pd.DataFrame(self._columns, copy=False)
+
+    def to_records(self):
+        """Row-dict view for JSON responses and prompts"""
+        if not self._length:
+            return []
+        names = list(self._columns.keys())
+        values = [self._python_values(self._columns[name]) for name in names]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    @staticmethod
+    def _python_values(array):
+        """Convert a column to Python objects, keeping datetimes as Timestamps"""
+        if array.dtype.kind == 'M':
+            return list(pd.DatetimeIndex(array))
+        return array.tolist()
+
+    def __repr__(self):
+        return f"ColumnarResult(rows={self._length}, columns={self.column_names})"
@@ -0,0 +1,214 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class RedshiftConnectionPool:
+    """Bounded, thread-safe pool of Redshift connections"""
+
+    def __init__(self, connect_fn, max_size=5, max_lifetime=1800, max_idle=300,
+                 health_check_interval=30, checkout_timeout=30):
+        self.connect_fn = connect_fn
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._in_use = {}     # id(conn) -> created_at
+        self._opening = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._stats = {
+            'created': 0,
+            'recycled': 0,
+            'failed_health_checks': 0,
+            'connect_failures': 0,
+            'checkouts': 0,
+            'checkout_timeouts': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0
+        }
+
+    def _expired(self, created_at, last_used, now):
+        """Check lifetime and idle limits for a pooled connection"""
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            return True
+        if self.max_idle and now - last_used > self.max_idle:
+            return True
+        return False
+
+    def _is_healthy(self, conn, last_used, now):
+        """Validate a connection before handing it out"""
+        if conn.closed:
+            return False
+        if now - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        """Close a connection that is leaving the pool"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        """Check out a connection, opening a new one if the pool has room"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        # Idle connections deeper in the stack are never popped, so sweep them here
+        self.evict_idle()
+
+        while True:
+            with self._cond:
+                while not self._idle and len(self._in_use) + self._opening >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._closed:
+                        self._stats['checkout_timeouts'] += 1
+                        print(f"⚠️ Timed out waiting for a pooled Redshift connection")
+                        return None
+                    self._cond.wait(remaining)
+
+                if self._closed:
+                    return None
+
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                    self._in_use[id(conn)] = created_at
+                    reuse = True
+                else:
+                    self._opening += 1
+                    reuse = False
+
+            if reuse:
+                now = time.monotonic()
+                if self._expired(created_at, last_used, now) or not self._is_healthy(conn, last_used, now):
+                    with self._cond:
+                        del self._in_use[id(conn)]
+                        self._stats['recycled'] += 1
+                        if not self._expired(created_at, last_used, now):
+                            self._stats['failed_health_checks'] += 1
+                        self._cond.notify()
+                    self._discard(conn)
+                    continue
+                self._record_checkout(start)
+                return conn
+
+            conn = None
+            try:
+                conn = self.connect_fn()
+            finally:
+                with self._cond:
+                    self._opening -= 1
+                    if conn:
+                        self._in_use[id(conn)] = time.monotonic()
+                        self._stats['created'] += 1
+                    else:
+                        self._stats['connect_failures'] += 1
+                    self._cond.notify()
+
+            if conn:
+                self._record_checkout(start)
+            return conn
+
+    def _record_checkout(self, start):
+        """Track wait time statistics for a successful checkout"""
+        waited = time.monotonic() - start
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['total_wait_seconds'] += waited
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool"""
+        if conn is None:
+            return
+
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+            if created_at is None:
+                # Not ours (or already released)
+                discard = True
+            elif discard or conn.closed or self._closed:
+                self._stats['recycled'] += 1
+                discard = True
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+        if discard:
+            self._discard(conn)
+        self.evict_idle()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager yielding a pooled connection (or None if unavailable)"""
+        conn = self.acquire(timeout)
+        failed = False
+        try:
+            yield conn
+        except psycopg2.OperationalError:
+            failed = True
+            raise
+        finally:
+            self.release(conn, discard=failed)
+
+    def evict_idle(self):
+        """Close idle connections past their lifetime or idle limit (run on every acquire and release)"""
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            keep = deque()
+            for entry in self._idle:
+                if self._expired(entry[1], entry[2], now):
+                    expired.append(entry[0])
+                else:
+                    keep.append(entry)
+            self._idle = keep
+            self._stats['recycled'] += len(expired)
+        for conn in expired:
+            self._discard(conn)
+        return len(expired)
+
+    def stats(self):
+        """Snapshot of pool usage statistics"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['in_use'] = len(self._in_use)
+            stats['idle'] = len(self._idle)
+            stats['max_size'] = self.max_size
+        checkouts = stats['checkouts']
+        stats['avg_wait_seconds'] = stats['total_wait_seconds'] / checkouts if checkouts else 0.0
+        return stats
+
+    def close_all(self):
+        """Close every idle connection and stop handing out new ones"""
+        with self._cond:
+            self._closed = True
+            idle = [entry[0] for entry in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
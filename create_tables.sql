@@ -6,40 +6,51 @@ DROP TABLE IF EXISTS product_sales CASCADE;
 
 -- Create sales_transactions table
 CREATE TABLE sales_transactions (
-    transaction_id VARCHAR(50) PRIMARY KEY,
-    transaction_date DATE NOT NULL,
-    region VARCHAR(50) NOT NULL,
-    amount DECIMAL(12,2) NOT NULL,
-    customer_id VARCHAR(50),
-    product_id VARCHAR(50)
-);
+    transaction_id VARCHAR(50) ENCODE ZSTD PRIMARY KEY,
+    transaction_date DATE ENCODE RAW NOT NULL,
+    region VARCHAR(50) ENCODE BYTEDICT NOT NULL,
+    amount DECIMAL(12,2) ENCODE AZ64 NOT NULL,
+    customer_id VARCHAR(50) ENCODE ZSTD,
+    product_id VARCHAR(50) ENCODE ZSTD
+)
+DISTSTYLE EVEN
+COMPOUND SORTKEY (transaction_date, region);
 
 -- Create expenses table
 CREATE TABLE expenses (
-    expense_id VARCHAR(50) PRIMARY KEY,
-    expense_date DATE NOT NULL,
-    category VARCHAR(50) NOT NULL,
-    amount DECIMAL(12,2) NOT NULL,
-    description VARCHAR(200)
-);
+    expense_id VARCHAR(50) ENCODE ZSTD PRIMARY KEY,
+    expense_date DATE ENCODE RAW NOT NULL,
+    category VARCHAR(50) ENCODE BYTEDICT NOT NULL,
+    amount DECIMAL(12,2) ENCODE AZ64 NOT NULL,
+    description VARCHAR(200) ENCODE ZSTD
+)
+DISTSTYLE EVEN
+COMPOUND SORTKEY (expense_date, category);
 
 -- Create customers table
 CREATE TABLE customers (
-    customer_id VARCHAR(50) PRIMARY KEY,
-    first_purchase_date DATE NOT NULL,
-    lifetime_value DECIMAL(12,2) NOT NULL,
-    region VARCHAR(50)
-);
+    customer_id VARCHAR(50) ENCODE ZSTD PRIMARY KEY,
+    first_purchase_date DATE ENCODE RAW NOT NULL,
+    lifetime_value DECIMAL(12,2) ENCODE AZ64 NOT NULL,
+    region VARCHAR(50) ENCODE BYTEDICT
+)
+DISTSTYLE EVEN
+COMPOUND SORTKEY (first_purchase_date);
 
 -- Create product_sales table
 CREATE TABLE product_sales (
-    sale_id VARCHAR(50) PRIMARY KEY,
-    sale_date DATE NOT NULL,
-    product_category VARCHAR(50) NOT NULL,
-    quantity_sold INTEGER NOT NULL,
-    revenue DECIMAL(12,2) NOT NULL,
-    profit_margin DECIMAL(5,4) NOT NULL
-);
+    sale_id VARCHAR(50) ENCODE ZSTD PRIMARY KEY,
+    sale_date DATE ENCODE RAW NOT NULL,
+    product_category VARCHAR(50) ENCODE BYTEDICT NOT NULL,
+    quantity_sold INTEGER ENCODE AZ64 NOT NULL,
+    revenue DECIMAL(12,2) ENCODE AZ64 NOT NULL,
+    profit_margin DECIMAL(5,4) ENCODE AZ64 NOT NULL
+)
+DISTSTYLE EVEN
+COMPOUND SORTKEY (sale_date, product_category);
+
+-- After loading data, re-sort and refresh statistics
+-- VACUUM FULL sales_transactions TO 100 PERCENT; ANALYZE sales_transactions;
 
 -- Verify tables were created
 SELECT table_name 
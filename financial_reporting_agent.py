@@ -4,12 +4,17 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from llm_cache import LLMResponseCache
+from quota_manager import get_rate_limiter
+
 load_dotenv()
 
 class FinancialReportingAgent:
     def __init__(self, name="FinancialAnalyst"):
         self.name = name
         self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.llm_cache = LLMResponseCache()
+        self.rate_limiter = get_rate_limiter('openai')
         
         # Mock Redshift connection (replace with actual psycopg2 connection)
         self.mock_data = {
@@ -91,16 +96,27 @@ class FinancialReportingAgent:
         Keep the analysis concise and business-focused.
         """
         
-        response = self.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a senior financial analyst providing executive-level insights."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=400
+        model = "gpt-3.5-turbo"
+        system_prompt = "You are a senior financial analyst providing executive-level insights."
+        max_tokens = 400
+        
+        def call_llm():
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens
+            )
+            usage = getattr(response, 'usage', None)
+            return response.choices[0].message.content, getattr(usage, 'total_tokens', 0)
+        
+        estimate = self.rate_limiter.estimate_tokens(system_prompt, prompt, max_tokens=max_tokens)
+        return self.llm_cache.get_or_compute(
+            model, system_prompt, prompt, max_tokens,
+            lambda: self.rate_limiter.call(call_llm, estimate)
         )
-        
-        return response.choices[0].message.content
     
     def generate_report(self, report_type, filters=None):
         """Generate comprehensive financial report"""
@@ -1,12 +1,40 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
 import '../ai-insights.css';
 
 function AIInsights({ reportData }) {
   const [activeInsightTab, setActiveInsightTab] = useState('revenue');
-  
-  if (!reportData || !reportData.ai_insights) return <div>Loading AI insights...</div>;
+  const [jobInsights, setJobInsights] = useState(null);
 
-  const { ai_insights } = reportData;
+  // The report carries job IDs for its insights; long-poll each until it finishes
+  useEffect(() => {
+    if (!reportData || reportData.ai_insights || !reportData.ai_jobs) return;
+    let cancelled = false;
+
+    const pollJob = async (key, jobId) => {
+      while (!cancelled) {
+        try {
+          const { data: job } = await axios.get(`http://localhost:5000/api/jobs/${jobId}?wait=25`);
+          if (job.status === 'done') return job.result[key];
+          if (job.status === 'error') return `AI analysis unavailable: ${job.error}`;
+        } catch (error) {
+          console.error('Error fetching insight job:', error);
+          return null;
+        }
+      }
+      return null;
+    };
+
+    setJobInsights({});
+    Object.entries(reportData.ai_jobs).forEach(async ([key, jobId]) => {
+      const content = await pollJob(key, jobId);
+      if (!cancelled) setJobInsights(current => ({ ...current, [key]: content }));
+    });
+    return () => { cancelled = true; };
+  }, [reportData]);
+
+  const ai_insights = reportData && (reportData.ai_insights || jobInsights);
+  if (!ai_insights) return <div>Loading AI insights...</div>;
 
   const insights = {
     revenue: { title: 'Revenue Analysis', content: ai_insights.revenue, icon: '📊' },
@@ -87,7 +115,9 @@ function AIInsights({ reportData }) {
         <div className="insight-content">
           {insights[activeInsightTab].content ? 
             formatInsightContent(insights[activeInsightTab].content) :
-            <div className="no-content">Analysis not available</div>
+            <div className="no-content">
+              {insights[activeInsightTab].content === undefined ? 'Generating analysis...' : 'Analysis not available'}
+            </div>
           }
         </div>
       </div>
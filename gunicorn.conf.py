@@ -0,0 +1,36 @@
+import os
+import sys
+import multiprocessing
+
+# Production serving for api_server (and langchain_api_server):
+#   gunicorn -c gunicorn.conf.py api_server:app
+# Workers share the API response cache through API_CACHE_PATH, so a report
+# computed by one worker is served by all of them.
+
+bind = os.getenv('API_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('API_WORKERS', str(min(4, multiprocessing.cpu_count() * 2 + 1))))
+worker_class = 'gthread'
+threads = int(os.getenv('API_THREADS', '8'))
+
+# A cold report (Redshift queries plus LLM calls) can take minutes
+timeout = int(os.getenv('API_WORKER_TIMEOUT', '300'))
+graceful_timeout = 30
+
+# Each worker opens its own Redshift pool and SQLite handles after the fork
+preload_app = False
+
+
+def _app_module(worker):
+    return sys.modules.get(getattr(worker.wsgi, 'import_name', ''))
+
+
+def post_worker_init(worker):
+    module = _app_module(worker)
+    if hasattr(module, 'start_background'):
+        module.start_background()
+
+
+def worker_exit(server, worker):
+    module = _app_module(worker)
+    if hasattr(module, 'shutdown'):
+        module.shutdown()
@@ -0,0 +1,66 @@
+import os
+import gzip
+import hashlib
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class PreparedResponse:
+    """A JSON body serialized once, with its strong ETag and precompressed variants
+
+    Built once per cache fill so that requests only pick bytes: bodies of at
+    least min_size bytes (API_COMPRESS_MIN_SIZE) are stored gzip- and, when
+    the brotli package is installed, brotli-compressed. meta holds extra
+    facts about the payload that callers need without parsing the body.
+    """
+
+    def __init__(self, body, min_size=None, meta=None):
+        if min_size is None:
+            min_size = int(os.getenv('API_COMPRESS_MIN_SIZE', '1024'))
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.meta = meta or {}
+
+        self.encodings = {}
+        if len(self.body) >= min_size:
+            if brotli is not None:
+                self.encodings['br'] = brotli.compress(self.body, quality=5)
+            self.encodings['gzip'] = gzip.compress(self.body, compresslevel=6, mtime=0)
+            # Drop variants that don't actually save anything
+            self.encodings = {name: data for name, data in self.encodings.items() if len(data) < len(self.body)}
+
+    def _encoding(self):
+        for name in ('br', 'gzip'):
+            if name in self.encodings and request.accept_encodings[name] > 0:
+                return name
+        return None
+
+    def etag_for(self, encoding):
+        """Strong validators must differ between content-codings of the same body"""
+        return f"{self.etag}-{encoding}" if encoding else self.etag
+
+    def to_response(self, max_age=0):
+        """Response for the current request: 304 on a matching If-None-Match, else the best encoding"""
+        encoding = self._encoding()
+        # Any coding of this body is still current, whichever one the client cached
+        current = [self.etag_for(name) for name in (None, *self.encodings)]
+        if any(request.if_none_match.contains_weak(tag) for tag in current):
+            response = Response(status=304)
+        else:
+            response = Response(self.encodings[encoding] if encoding else self.body, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(self.etag_for(encoding))
+        response.vary.add('Accept-Encoding')
+        # Clients may reuse the body until the cache entry goes stale, then revalidate
+        response.cache_control.public = True
+        response.cache_control.max_age = int(max_age)
+        if not max_age:
+            response.cache_control.must_revalidate = True
+        return response
@@ -0,0 +1,163 @@
+import os
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+import sqlite_store
+from columnar import ColumnarResult
+
+
+# Rolling-window templates whose SUM aggregates can be refreshed incrementally.
+# Closed months are kept locally at day grain so the window's partial first
+# month can be re-cut exactly as the full query would.
+INCREMENTAL_TEMPLATES = {
+    'monthly_revenue': {
+        'table': 'sales_transactions',
+        'date_column': 'transaction_date',
+        'dimension': 'region',
+        'measure': 'amount',
+        'output': 'revenue',
+        'window': '12 months'
+    },
+    'expense_breakdown': {
+        'table': 'expenses',
+        'date_column': 'expense_date',
+        'dimension': 'category',
+        'measure': 'amount',
+        'output': 'total_expense',
+        'window': '12 months'
+    }
+}
+
+
+class IncrementalAggregateStore:
+    """Local day-grain aggregates for closed months, merged with a Redshift delta"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('INCREMENTAL_STORE_PATH', 'aggregate_store.db')
+        self._lock = threading.Lock()
+        self._db = sqlite_store.connect(self.path, """
+            CREATE TABLE IF NOT EXISTS daily_aggregates (
+                template TEXT NOT NULL,
+                day TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                total TEXT NOT NULL,
+                PRIMARY KEY (template, day, dimension)
+            );
+            CREATE TABLE IF NOT EXISTS refresh_state (
+                template TEXT PRIMARY KEY,
+                stored_from TEXT NOT NULL,
+                closed_through TEXT NOT NULL,
+                refreshed_at TEXT NOT NULL
+            );
+        """, wal=True)
+
+    def _state(self, template):
+        row = self._db.execute(
+            "SELECT stored_from, closed_through FROM refresh_state WHERE template = ?", (template,)
+        ).fetchone()
+        if row is None:
+            return None
+        return date.fromisoformat(row[0]), date.fromisoformat(row[1])
+
+    def _fetch_window(self, conn, spec):
+        """Redshift's own CURRENT_DATE and window start, so boundaries match the full query"""
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT CURRENT_DATE, (CURRENT_DATE - INTERVAL '{spec['window']}')::date"
+            )
+            today, window_start = cursor.fetchone()
+        return today, window_start
+
+    def _fetch_daily(self, conn, spec, start):
+        """Day x dimension sums on or after start"""
+        query = f"""
+            SELECT {spec['date_column']} AS day, {spec['dimension']}, SUM({spec['measure']})
+            FROM {spec['table']}
+            WHERE {spec['date_column']} >= %s
+            GROUP BY 1, 2
+        """
+        with conn.cursor() as cursor:
+            cursor.execute(query, (start,))
+            return cursor.fetchall()
+
+    def refresh(self, conn, query_name, force_full=False):
+        """Return the template's result, scanning only rows since the last closed month"""
+        spec = INCREMENTAL_TEMPLATES[query_name]
+
+        with self._lock:
+            today, window_start = self._fetch_window(conn, spec)
+            month_start = today.replace(day=1)
+            state = None if force_full else self._state(query_name)
+
+            if state is None or state[0] > window_start or state[1] > month_start:
+                scan_from = window_start
+                mode = 'full rebuild'
+                self._db.execute("DELETE FROM daily_aggregates WHERE template = ?", (query_name,))
+                stored_from = window_start
+            else:
+                scan_from = state[1]
+                mode = 'delta'
+                stored_from = state[0]
+
+            print(f"🔄 Incremental refresh ({mode}) for {query_name} from {scan_from}")
+            delta = self._fetch_daily(conn, spec, scan_from)
+
+            # Rows in now-closed months become part of the local store
+            closed = [
+                (query_name, day.isoformat(), dimension, str(total))
+                for day, dimension, total in delta if day < month_start
+            ]
+            self._db.execute(
+                "DELETE FROM daily_aggregates WHERE template = ? AND day >= ?",
+                (query_name, scan_from.isoformat())
+            )
+            self._db.executemany("INSERT OR REPLACE INTO daily_aggregates VALUES (?, ?, ?, ?)", closed)
+            self._db.execute(
+                "DELETE FROM daily_aggregates WHERE template = ? AND day < ?",
+                (query_name, window_start.isoformat())
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO refresh_state VALUES (?, ?, ?, ?)",
+                (query_name, max(stored_from, window_start).isoformat(), month_start.isoformat(),
+                 datetime.now().isoformat())
+            )
+            self._db.commit()
+
+            stored = self._db.execute(
+                "SELECT day, dimension, total FROM daily_aggregates WHERE template = ? AND day >= ?",
+                (query_name, window_start.isoformat())
+            ).fetchall()
+
+        rows = [(date.fromisoformat(day), dimension, Decimal(total)) for day, dimension, total in stored]
+        rows += [(day, dimension, total) for day, dimension, total in delta if day >= month_start]
+        return self._roll_up(rows, spec)
+
+    def _roll_up(self, rows, spec):
+        """Month x dimension sums, ordered like the full-refresh query"""
+        totals = {}
+        for day, dimension, total in rows:
+            key = (day.replace(day=1), dimension)
+            totals[key] = totals[key] + total if key in totals else total
+
+        keys = sorted(totals)
+        return ColumnarResult({
+            'month': pd.to_datetime([month for month, _ in keys]).to_numpy(),
+            spec['dimension']: np.array([dimension for _, dimension in keys], dtype=object),
+            # Summed exactly as Decimal, returned as float64 like pd.read_sql's coerce_float
+            spec['output']: np.array([float(totals[key]) for key in keys], dtype=np.float64)
+        })
+
+    def reset(self, query_name=None):
+        """Forget stored aggregates so the next refresh is a full rebuild"""
+        with self._lock:
+            if query_name is None:
+                self._db.execute("DELETE FROM daily_aggregates")
+                self._db.execute("DELETE FROM refresh_state")
+            else:
+                self._db.execute("DELETE FROM daily_aggregates WHERE template = ?", (query_name,))
+                self._db.execute("DELETE FROM refresh_state WHERE template = ?", (query_name,))
+            self._db.commit()
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlite_store
+
+
+FINAL_STATUSES = ('done', 'error')
+
+
+class InsightJobQueue:
+    """Background AI-insight jobs, de-duplicated by input hash
+
+    submit() returns at once with a job id derived from the job's input hash,
+    so identical inputs (same data and prompt) share one job. A bounded pool
+    of API_INSIGHT_WORKERS threads runs the jobs and finished results are kept
+    for API_INSIGHT_JOB_RETENTION seconds; failed jobs run again on the next
+    submit.
+
+    With a path (API_INSIGHT_JOBS_PATH) jobs are also stored in SQLite, so any
+    worker process can answer a poll and a job queued in one process is not
+    started again by another.
+    """
+
+    def __init__(self, max_workers=None, retention=None, path=None, stale_after=None):
+        self.max_workers = max_workers or int(os.getenv('API_INSIGHT_WORKERS', '2'))
+        self.retention = retention or int(os.getenv('API_INSIGHT_JOB_RETENTION', '3600'))
+        self.path = path if path is not None else os.getenv('API_INSIGHT_JOBS_PATH', 'insight_jobs.db')
+        # An unfinished job owned by another process is presumed dead after this
+        self.stale_after = stale_after or int(os.getenv('API_INSIGHT_JOB_TIMEOUT', '300'))
+        self.owner = f"{os.getpid()}:{id(self)}"
+
+        self._jobs = {}    # id -> job dict (jobs submitted by this process)
+        self._events = {}  # id -> threading.Event set when the job finishes
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='insight-job')
+        self._stats = {'submitted': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0}
+
+        self._db = None
+        if self.path:
+            self._db = sqlite_store.connect(self.path, """
+                CREATE TABLE IF NOT EXISTS insight_jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    owner TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                );
+            """, label='Shared insight job store', fallback='keeping jobs in this process only', wal=True)
+
+    @staticmethod
+    def job_id(input_hash):
+        return input_hash[:32]
+
+    def _reusable(self, job, now):
+        if job['status'] == 'done':
+            return True
+        if job['status'] == 'error':
+            return False
+        return job['owner'] == self.owner or now - (job['started_at'] or job['created_at']) < self.stale_after
+
+    def _row_to_job(self, row):
+        keys = ('id', 'status', 'result', 'error', 'owner', 'created_at', 'started_at', 'finished_at')
+        job = dict(zip(keys, row))
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def _load(self, job_id):
+        try:
+            with self._db_lock:
+                # Checked under the lock: close() may run concurrently
+                if self._db is None:
+                    return None
+                row = self._db.execute("SELECT * FROM insight_jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._row_to_job(row) if row else None
+        except sqlite3.Error as e:
+            print(f"⚠️ Insight job read failed: {e}")
+            return None
+
+    def _save(self, job):
+        try:
+            with self._db_lock:
+                if self._db is None:
+                    return
+                self._db.execute(
+                    "INSERT OR REPLACE INTO insight_jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job['id'], job['status'], json.dumps(job['result']) if job['result'] is not None else None,
+                     job['error'], job['owner'], job['created_at'], job['started_at'], job['finished_at'])
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Insight job write failed: {e}")
+
+    def _claim(self, job):
+        """Store a new job unless a reusable one with its id exists; returns the job to use"""
+        try:
+            with self._db_lock:
+                if self._db is None:
+                    return job
+                with sqlite_store.immediate(self._db) as db:
+                    row = db.execute("SELECT * FROM insight_jobs WHERE id = ?", (job['id'],)).fetchone()
+                    if row is not None:
+                        existing = self._row_to_job(row)
+                        if self._reusable(existing, time.time()):
+                            return existing
+                    db.execute(
+                        "INSERT OR REPLACE INTO insight_jobs VALUES (?, ?, NULL, NULL, ?, ?, NULL, NULL)",
+                        (job['id'], job['status'], job['owner'], job['created_at'])
+                    )
+                    return job
+        except sqlite3.Error as e:
+            print(f"⚠️ Insight job claim failed ({e}); running locally")
+            return job
+
+    def _prune(self, now):
+        """Forget finished jobs past the retention period; caller holds the lock"""
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] and now - job['finished_at'] > self.retention]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._events.pop(job_id, None)
+        try:
+            with self._db_lock:
+                if self._db is None:
+                    return
+                self._db.execute("DELETE FROM insight_jobs WHERE finished_at < ?", (now - self.retention,))
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Insight job cleanup failed: {e}")
+
+    def submit(self, input_hash, compute_fn):
+        """Job id for compute_fn(), starting it unless an identical job is pending or done"""
+        job_id = self.job_id(input_hash)
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            local = self._jobs.get(job_id)
+            if local is not None and self._reusable(local, now):
+                self._stats['deduplicated'] += 1
+                return job_id
+
+            job = {'id': job_id, 'status': 'queued', 'result': None, 'error': None, 'owner': self.owner,
+                   'created_at': now, 'started_at': None, 'finished_at': None}
+            claimed = self._claim(job)
+            if claimed is not job:
+                # Queued, running or finished in another worker process
+                self._stats['deduplicated'] += 1
+                return job_id
+            self._jobs[job_id] = job
+            self._events[job_id] = threading.Event()
+            self._stats['submitted'] += 1
+
+        self._executor.submit(self._run, job, compute_fn)
+        return job_id
+
+    def _run(self, job, compute_fn):
+        with self._lock:
+            job['status'], job['started_at'] = 'running', time.time()
+        self._save(job)
+        try:
+            result = compute_fn()
+            with self._lock:
+                job['status'], job['result'] = 'done', result
+                self._stats['completed'] += 1
+        except Exception as e:
+            print(f"❌ Insight job {job['id']} failed: {e}")
+            with self._lock:
+                job['status'], job['error'] = 'error', str(e)
+                self._stats['failed'] += 1
+        with self._lock:
+            job['finished_at'] = time.time()
+            event = self._events.get(job['id'])
+        self._save(job)
+        if event is not None:
+            event.set()
+
+    def get(self, job_id):
+        """Public view of a job (status, result, error, timings), or None if unknown"""
+        with self._lock:
+            local = self._jobs.get(job_id)
+            job = dict(local) if local is not None else None
+        if job is None:
+            job = self._load(job_id)
+            if job is None:
+                return None
+            if job['status'] not in FINAL_STATUSES and not self._reusable(job, time.time()):
+                job['status'], job['error'] = 'error', 'Abandoned by the worker process that was running it'
+        return {key: value for key, value in job.items() if key != 'owner'}
+
+    def wait(self, job_id, timeout):
+        """get(), after waiting up to timeout seconds for the job to finish (long-poll)"""
+        end = time.monotonic() + timeout
+        with self._lock:
+            event = self._events.get(job_id)
+        if event is not None:
+            event.wait(timeout)
+            return self.get(job_id)
+
+        # Running in another process: poll the shared store
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in FINAL_STATUSES or time.monotonic() >= end:
+                return job
+            time.sleep(min(0.5, max(0, end - time.monotonic())))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self):
+        """Submission and dedup counters plus jobs by status in this process"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['workers'] = self.max_workers
+            stats['shared'] = self._db is not None
+            for job in self._jobs.values():
+                stats[job['status']] = stats.get(job['status'], 0) + 1
+        return stats
@@ -1,3 +1,4 @@
+import os
 from flask import Flask, jsonify
 from flask_cors import CORS
 from langchain_redshift_agent import LangChainRedshiftAgent
@@ -44,5 +45,6 @@ def get_financial_report():
         print(f"Error generating report: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Production: gunicorn -c gunicorn.conf.py -b 0.0.0.0:5001 langchain_api_server:app
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    app.run(debug=os.getenv('API_DEBUG', 'true').lower() == 'true', port=5001)
\ No newline at end of file
@@ -19,6 +19,8 @@ from langchain import hub
 import psycopg2
 import pandas as pd
 
+from prompt_encoder import encode_data
+
 load_dotenv()
 
 def query_redshift_data(query_name: str) -> str:
@@ -93,8 +95,8 @@ class LangChainRedshiftAgent:
             model="gpt-3.5-turbo",  # Using cheaper model to reduce quota usage
             temperature=0.1,
             openai_api_key=os.getenv('OPENAI_API_KEY'),
-            max_retries=3,
-            request_timeout=60
+            max_retries=int(os.getenv('LLM_MAX_RETRIES', '2')),
+            request_timeout=float(os.getenv('LLM_CALL_TIMEOUT', '30'))
         )
         
         # Memory for conversation context
@@ -168,6 +170,13 @@ class LangChainRedshiftAgent:
                 data = input_data
                 analysis_type = "financial"
             
+            # Tool output is JSON; re-encode it as compact tables within the token budget
+            try:
+                data, tokens, summarized = encode_data(json.loads(data), int(os.getenv('PROMPT_TOKEN_BUDGET', '1500')))
+                print(f"🧮 {analysis_type} data: ~{tokens:,} prompt tokens{' (summarized)' if summarized else ''}")
+            except ValueError:
+                pass
+            
             result = self.analysis_chain.invoke({
                 "data": data,
                 "analysis_type": analysis_type
@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import sqlite_store
+
+
+class LLMResponseCache:
+    """Content-addressed cache for LLM completions (memory LRU + on-disk SQLite tier)"""
+
+    def __init__(self, path=None, ttl_seconds=None, max_memory_entries=256, max_disk_entries=5000):
+        self.path = path or os.getenv('LLM_CACHE_PATH', 'llm_cache.db')
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv('LLM_CACHE_TTL', '86400'))
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._memory = OrderedDict()  # key -> (response, tokens, created_at)
+        self._inflight = {}           # key -> Future
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'inflight_waits': 0,
+            'tokens_saved': 0,
+            'evictions': 0
+        }
+
+        self._db = None
+        if self.path:
+            self._db = sqlite_store.connect(self.path, """
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                );
+            """, label='LLM disk cache', fallback='using memory only', wal=True)
+
+    @staticmethod
+    def make_key(model, system_prompt, prompt, max_tokens):
+        """Hash of everything that determines the completion"""
+        payload = json.dumps([model, system_prompt, prompt, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _fresh(self, created_at, now):
+        return not self.ttl_seconds or now - created_at < self.ttl_seconds
+
+    def _get_memory(self, key, now):
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        if not self._fresh(entry[2], now):
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return entry
+
+    def _put_memory(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _get_disk(self, key, now):
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT response, tokens, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if not self._fresh(row[2], now):
+                    self._db.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    return None
+                self._db.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            return row
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM disk cache read failed: {e}")
+            return None
+
+    def _put_disk(self, key, entry, now):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?)",
+                    (key, entry[0], entry[1], entry[2], now)
+                )
+                if self.ttl_seconds:
+                    self._db.execute(
+                        "DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,)
+                    )
+                # Size-based eviction: keep the most recently used entries
+                deleted = self._db.execute("""
+                    DELETE FROM llm_responses WHERE key IN (
+                        SELECT key FROM llm_responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_disk_entries,)).rowcount
+                self._db.commit()
+            if deleted > 0:
+                with self._lock:
+                    self._stats['evictions'] += deleted
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM disk cache write failed: {e}")
+
+    def _claim(self, key, now):
+        """Memory hit, or the in-flight Future for key and whether this caller owns it"""
+        with self._lock:
+            entry = self._get_memory(key, now)
+            if entry is not None:
+                self._stats['memory_hits'] += 1
+                self._stats['tokens_saved'] += entry[1]
+                return entry, None, False
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = Future()
+                self._inflight[key] = pending
+                return None, pending, True
+            self._stats['inflight_waits'] += 1
+            return None, pending, False
+
+    def _load(self, key, now):
+        """Disk-tier lookup by the owner of an in-flight key"""
+        entry = self._get_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+            self._stats['tokens_saved'] += entry[1]
+            self._put_memory(key, tuple(entry))
+        return entry
+
+    def _store(self, key, response, tokens):
+        entry = (response, int(tokens or 0), time.time())
+        with self._lock:
+            self._put_memory(key, entry)
+        self._put_disk(key, entry, entry[2])
+
+    def _answer(self, result, key, model, system_prompt, prompt, max_tokens):
+        """(response, tokens, answering model, key to store under) for a compute_fn result
+
+        compute_fn may return (response, tokens, answering_model); a fallback
+        model's answer is cached as that model's completion, never as the
+        requested model's.
+        """
+        response, tokens = result[0], result[1]
+        if len(result) > 2 and result[2] != model:
+            return response, tokens, result[2], self.make_key(result[2], system_prompt, prompt, max_tokens)
+        return response, tokens, model, key
+
+    def _release(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def get_or_compute(self, model, system_prompt, prompt, max_tokens, compute_fn, with_model=False):
+        """Return a cached completion or call compute_fn() -> (response_text, total_tokens[, model])
+
+        With with_model, returns (response_text, answering_model) instead.
+        """
+        key = self.make_key(model, system_prompt, prompt, max_tokens)
+        now = time.time()
+
+        entry, pending, owner = self._claim(key, now)
+        if entry is not None:
+            return (entry[0], model) if with_model else entry[0]
+        # Identical request already running on another thread: share its result
+        if not owner:
+            response, answered_by = pending.result()
+            return (response, answered_by) if with_model else response
+
+        try:
+            entry = self._load(key, now)
+            if entry is None:
+                response, tokens, answered_by, store_key = self._answer(
+                    compute_fn(), key, model, system_prompt, prompt, max_tokens
+                )
+                self._store(store_key, response, tokens)
+            else:
+                response, answered_by = entry[0], model
+            pending.set_result((response, answered_by))
+            return (response, answered_by) if with_model else response
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            self._release(key)
+
+    async def aget_or_compute(self, model, system_prompt, prompt, max_tokens, compute_fn, with_model=False):
+        """Async get_or_compute; compute_fn is a coroutine function -> (response_text, total_tokens[, model])
+
+        Shares in-flight requests with synchronous callers; SQLite access runs
+        in a worker thread so the event loop is never blocked on disk.
+        """
+        key = self.make_key(model, system_prompt, prompt, max_tokens)
+        now = time.time()
+
+        entry, pending, owner = self._claim(key, now)
+        if entry is not None:
+            return (entry[0], model) if with_model else entry[0]
+        if not owner:
+            response, answered_by = await asyncio.wrap_future(pending)
+            return (response, answered_by) if with_model else response
+
+        try:
+            entry = await asyncio.to_thread(self._load, key, now)
+            if entry is None:
+                response, tokens, answered_by, store_key = self._answer(
+                    await compute_fn(), key, model, system_prompt, prompt, max_tokens
+                )
+                await asyncio.to_thread(self._store, store_key, response, tokens)
+            else:
+                response, answered_by = entry[0], model
+            pending.set_result((response, answered_by))
+            return (response, answered_by) if with_model else response
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            self._release(key)
+
+    def invalidate(self, key=None):
+        """Drop one entry (by key) or the whole cache"""
+        with self._lock:
+            if key is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(key, None)
+        if self._db is not None:
+            with self._db_lock:
+                if key is None:
+                    self._db.execute("DELETE FROM llm_responses")
+                else:
+                    self._db.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._db.commit()
+
+    def stats(self):
+        """Hit/miss/token-saved counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['inflight'] = len(self._inflight)
+        hits = stats['memory_hits'] + stats['disk_hits']
+        lookups = hits + stats['misses']
+        stats['hit_rate'] = hits / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,297 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from quota_manager import DailyBudgetExceeded, RateLimitTimeout
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """No attempt finished before the call deadline"""
+
+
+def is_retryable(error):
+    """429s, 5xx, timeouts and connection errors are worth another attempt"""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ('APITimeoutError', 'APIConnectionError', 'TimeoutError')
+
+
+def retry_after(error):
+    """Server-suggested delay from a Retry-After header, if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class HedgedLLMCaller:
+    """Deadline-bounded LLM calls with jittered retries and optional hedging
+
+    request_fn(model, timeout) performs one completion and returns
+    (text, total_tokens); call() adds the model that answered. Each call
+    gets an overall deadline; 429/5xx errors are retried with jittered
+    exponential backoff inside it. When hedging is
+    on (LLM_HEDGE) and an attempt outlives the hedge delay (LLM_HEDGE_AFTER,
+    or the recent p95 latency once enough samples exist), a duplicate request
+    goes to the hedge model and whichever answers first wins. The hedge model
+    is the requested one unless LLM_HEDGE_MODEL names another.
+    """
+
+    def __init__(self, deadline=None, max_retries=None, hedge=None, hedge_after=None, hedge_model=None,
+                 hedge_percentile=0.95, min_samples=20, min_hedge_after=1.0, base_delay=0.5, max_delay=8.0):
+        self.deadline = deadline if deadline is not None else float(os.getenv('LLM_CALL_TIMEOUT', '30'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('LLM_MAX_RETRIES', '2'))
+        self.hedge = hedge if hedge is not None else os.getenv('LLM_HEDGE', 'false').lower() == 'true'
+        hedge_after = hedge_after if hedge_after is not None else os.getenv('LLM_HEDGE_AFTER')
+        self.hedge_after = float(hedge_after) if hedge_after else None
+        # None: hedge with the same model, so a hedge never changes who answers
+        self.hedge_model = hedge_model or os.getenv('LLM_HEDGE_MODEL') or None
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.min_hedge_after = min_hedge_after
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._latencies = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='llm-hedge')
+        self._stats = {'calls': 0, 'attempts': 0, 'retries': 0, 'hedges': 0, 'hedge_wins': 0,
+                       'hedges_skipped': 0, 'throttled': 0, 'deadline_exceeded': 0, 'failures': 0}
+
+    def hedge_delay(self):
+        """Seconds before a hedge is sent, or None when hedging is off or not yet calibrated"""
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        p = ordered[min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile))]
+        return max(self.min_hedge_after, p)
+
+    def _count(self, stat, n=1):
+        with self._lock:
+            self._stats[stat] += n
+
+    def _backoff(self, attempt, error, remaining):
+        delay = retry_after(error)
+        if delay is None:
+            delay = min(self.max_delay, self.base_delay * (2 ** attempt)) * random.uniform(0.5, 1.5)
+        return min(delay, remaining)
+
+    def _sample(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def _attempt(self, request_fn, model, timeout, limiter, estimate):
+        tokens = 0
+        try:
+            text, tokens = request_fn(model, timeout)
+        finally:
+            if limiter is not None:
+                limiter.settle(estimate, tokens)
+        return text, tokens, model
+
+    def _admit(self, limiter, estimate, remaining):
+        """Wait for rate-limit capacity before an attempt; False if none comes within remaining"""
+        if limiter is None:
+            return True
+        try:
+            limiter.acquire(estimate, max_wait=remaining)
+            return True
+        except RateLimitTimeout:
+            self._count('throttled')
+            return False
+
+    async def _aadmit(self, limiter, estimate, remaining):
+        if limiter is None:
+            return True
+        try:
+            await limiter.acquire_async(estimate, max_wait=remaining)
+            return True
+        except RateLimitTimeout:
+            self._count('throttled')
+            return False
+
+    def _admit_hedge(self, limiter, estimate):
+        """Hedge only with spare capacity: a throttled limiter must not get extra load"""
+        try:
+            if limiter is None or limiter.try_acquire(estimate) == 0:
+                self._count('hedges')
+                return True
+        except DailyBudgetExceeded:
+            pass
+        self._count('hedges_skipped')
+        return False
+
+    def _fail(self, model, deadline, last_error):
+        if last_error is None:
+            self._count('deadline_exceeded')
+            raise LLMDeadlineExceeded(f"LLM call to {model} exceeded its {deadline:g}s deadline")
+        self._count('failures')
+        raise last_error
+
+    def call(self, request_fn, model, deadline=None, limiter=None, estimate=0):
+        """Run request_fn within the deadline; returns (text, total_tokens, answering_model)
+
+        With a limiter, each attempt first waits for capacity (at most until
+        the deadline) and is charged its actual usage; the hedge timer only
+        starts once the request is actually sent. Primary attempts feed the
+        latency samples behind the hedge delay, including ones that lost to
+        the hedge or ran out of time (sampled at the time given up on), so
+        the percentile isn't biased towards fast responses.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        end = time.monotonic() + deadline
+        self._count('calls')
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            remaining = end - time.monotonic()
+            if remaining <= 0 or not self._admit(limiter, estimate, remaining):
+                last_error = None
+                break
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                if limiter is not None:
+                    limiter.settle(estimate, 0)
+                last_error = None
+                break
+            self._count('attempts')
+            primary = self._executor.submit(self._attempt, request_fn, model, remaining, limiter, estimate)
+            sent = time.monotonic()
+            pending = {primary}
+            hedge_after = self.hedge_delay()
+            hedged = False
+
+            while pending:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    break
+                timeout = min(hedge_after, remaining) if hedge_after is not None and not hedged else remaining
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is not primary:
+                            self._count('hedge_wins')
+                        if future is primary or primary in pending:
+                            # A primary that lost to the hedge took at least this long
+                            self._sample(time.monotonic() - sent)
+                        return future.result()
+                    last_error = future.exception()
+                if not done and hedge_after is not None and not hedged and end - time.monotonic() > 0:
+                    # Slow attempt: race a duplicate against it
+                    hedged = True
+                    if self._admit_hedge(limiter, estimate):
+                        pending.add(self._executor.submit(
+                            self._attempt, request_fn, self.hedge_model or model, end - time.monotonic(),
+                            limiter, estimate
+                        ))
+
+            if pending:
+                if primary in pending:
+                    self._sample(time.monotonic() - sent)
+                last_error = None  # out of time rather than failed
+                break
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            if not is_retryable(last_error) or attempt == self.max_retries:
+                break
+            self._count('retries')
+            time.sleep(self._backoff(attempt, last_error, remaining))
+
+        self._fail(model, deadline, last_error)
+
+    async def acall(self, request_fn, model, deadline=None, limiter=None, estimate=0):
+        """call() for a coroutine function request_fn(model, timeout)"""
+        loop = asyncio.get_running_loop()
+        deadline = self.deadline if deadline is None else deadline
+        end = loop.time() + deadline
+        self._count('calls')
+        last_error = None
+
+        async def send(model, timeout):
+            tokens = 0
+            try:
+                text, tokens = await request_fn(model, timeout)
+            finally:
+                if limiter is not None:
+                    await asyncio.to_thread(limiter.settle, estimate, tokens)
+            return text, tokens, model
+
+        for attempt in range(self.max_retries + 1):
+            remaining = end - loop.time()
+            if remaining <= 0 or not await self._aadmit(limiter, estimate, remaining):
+                last_error = None
+                break
+            remaining = end - loop.time()
+            if remaining <= 0:
+                if limiter is not None:
+                    await asyncio.to_thread(limiter.settle, estimate, 0)
+                last_error = None
+                break
+            self._count('attempts')
+            primary = asyncio.ensure_future(send(model, remaining))
+            sent = loop.time()
+            pending = {primary}
+            hedge_after = self.hedge_delay()
+            hedged = False
+
+            try:
+                while pending:
+                    remaining = end - loop.time()
+                    if remaining <= 0:
+                        break
+                    timeout = min(hedge_after, remaining) if hedge_after is not None and not hedged else remaining
+                    done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if task is not primary:
+                                self._count('hedge_wins')
+                            if task is primary or primary in pending:
+                                self._sample(loop.time() - sent)
+                            return task.result()
+                        last_error = task.exception()
+                    if not done and hedge_after is not None and not hedged and end - loop.time() > 0:
+                        hedged = True
+                        if await asyncio.to_thread(self._admit_hedge, limiter, estimate):
+                            pending.add(asyncio.ensure_future(
+                                send(self.hedge_model or model, end - loop.time())
+                            ))
+            finally:
+                # Unlike threads, losing coroutines can be cancelled
+                for task in pending:
+                    task.cancel()
+
+            if pending:
+                if primary in pending:
+                    self._sample(loop.time() - sent)
+                last_error = None
+                break
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            if not is_retryable(last_error) or attempt == self.max_retries:
+                break
+            self._count('retries')
+            await asyncio.sleep(self._backoff(attempt, last_error, remaining))
+
+        self._fail(model, deadline, last_error)
+
+    def stats(self):
+        """Attempt, retry, hedge and deadline counters plus the current hedge delay"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['latency_samples'] = len(self._latencies)
+        stats['hedge_after'] = self.hedge_delay()
+        return stats
@@ -0,0 +1,173 @@
+import os
+import argparse
+from datetime import date
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+REGIONS = np.array(['North America', 'Europe', 'Asia Pacific', 'Latin America'])
+EXPENSE_CATEGORIES = np.array(['Operations', 'Marketing', 'R&D', 'HR', 'IT', 'Legal'])
+PRODUCT_CATEGORIES = np.array(['Electronics', 'Clothing', 'Home & Garden', 'Books', 'Sports', 'Beauty'])
+
+# Row counts at scale factor 1 (the original demo dataset)
+BASE_ROWS = {
+    'sales_transactions': 1000,
+    'expenses': 500,
+    'customers': 200,
+    'product_sales': 800
+}
+BASE_PRODUCTS = 50
+
+
+class MockDataGenerator:
+    """Vectorized, seeded synthetic data for the four financial tables
+
+    Columns are built with NumPy in fixed-size chunks, so memory stays bounded
+    by chunk_size no matter how large the scale factor is. Every customer_id
+    referenced by sales_transactions exists in customers.
+    """
+
+    def __init__(self, scale_factor=1.0, seed=42, chunk_size=100_000, today=None):
+        self.scale_factor = scale_factor
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.today = np.datetime64(today or date.today(), 'D')
+        self.row_counts = {table: max(1, int(round(rows * scale_factor))) for table, rows in BASE_ROWS.items()}
+        self.n_products = max(1, int(round(BASE_PRODUCTS * scale_factor)))
+
+    def _ids(self, prefix, start, stop, total):
+        """Zero-padded string IDs like TXN_0042 for a chunk"""
+        width = max(4, len(str(total - 1)))
+        return np.char.add(prefix, np.char.zfill(np.arange(start, stop).astype(str), width))
+
+    def _dates(self, rng, n, min_days, max_days):
+        """Dates between min_days and max_days before today"""
+        return self.today - rng.integers(min_days, max_days + 1, n).astype('timedelta64[D]')
+
+    def generate(self, table):
+        """Yield column chunks ({column: ndarray}) for one table"""
+        total = self.row_counts[table]
+        table_index = list(BASE_ROWS).index(table)
+        builder = getattr(self, f'_build_{table}')
+
+        for chunk_index, start in enumerate(range(0, total, self.chunk_size)):
+            stop = min(start + self.chunk_size, total)
+            rng = np.random.default_rng([self.seed, table_index, chunk_index])
+            yield builder(rng, start, stop, total)
+
+    def _build_sales_transactions(self, rng, start, stop, total):
+        n = stop - start
+        n_customers = self.row_counts['customers']
+        return {
+            'transaction_id': self._ids('TXN_', start, stop, total),
+            'transaction_date': self._dates(rng, n, 1, 365),
+            'region': rng.choice(REGIONS, n),
+            'amount': np.round(rng.uniform(100, 50000, n), 2),
+            'customer_id': np.char.add('CUST_', np.char.zfill(
+                rng.integers(0, n_customers, n).astype(str), max(4, len(str(n_customers - 1))))),
+            'product_id': np.char.add('PROD_', np.char.zfill(
+                rng.integers(0, self.n_products, n).astype(str), max(3, len(str(self.n_products - 1)))))
+        }
+
+    def _build_expenses(self, rng, start, stop, total):
+        n = stop - start
+        category = rng.choice(EXPENSE_CATEGORIES, n)
+        return {
+            'expense_id': self._ids('EXP_', start, stop, total),
+            'expense_date': self._dates(rng, n, 1, 365),
+            'category': category,
+            'amount': np.round(rng.uniform(1000, 100000, n), 2),
+            'description': np.char.add(np.char.add(category, ' expense '), np.arange(start, stop).astype(str))
+        }
+
+    def _build_customers(self, rng, start, stop, total):
+        n = stop - start
+        return {
+            'customer_id': self._ids('CUST_', start, stop, total),
+            'first_purchase_date': self._dates(rng, n, 30, 730),
+            'lifetime_value': np.round(rng.uniform(500, 10000, n), 2),
+            'region': rng.choice(REGIONS, n)
+        }
+
+    def _build_product_sales(self, rng, start, stop, total):
+        n = stop - start
+        return {
+            'sale_id': self._ids('SALE_', start, stop, total),
+            'sale_date': self._dates(rng, n, 1, 90),
+            'product_category': rng.choice(PRODUCT_CATEGORIES, n),
+            'quantity_sold': rng.integers(1, 101, n),
+            'revenue': np.round(rng.uniform(50, 5000, n), 2),
+            'profit_margin': np.round(rng.uniform(0.1, 0.7, n), 4)
+        }
+
+    def iter_rows(self, table):
+        """Stream row tuples (Python types) chunk by chunk, e.g. for BulkLoader"""
+        for chunk in self.generate(table):
+            yield from zip(*(values.tolist() for values in chunk.values()))
+
+    def write_csv(self, out_dir, tables=None):
+        """Write one CSV per table, appending chunk by chunk"""
+        os.makedirs(out_dir, exist_ok=True)
+        paths = {}
+        for table in tables or BASE_ROWS:
+            path = os.path.join(out_dir, f'{table}.csv')
+            with open(path, 'w', newline='') as f:
+                for i, chunk in enumerate(self.generate(table)):
+                    if i == 0:
+                        f.write(','.join(chunk.keys()) + '\n')
+                    columns = [self._csv_column(values) for values in chunk.values()]
+                    f.writelines(','.join(row) + '\n' for row in zip(*columns))
+            paths[table] = path
+            print(f"✅ Wrote {self.row_counts[table]:,} rows to {path}")
+        return paths
+
+    @staticmethod
+    def _csv_column(values):
+        if values.dtype.kind in 'US':
+            # Quote text columns (descriptions and categories may contain '&' or spaces)
+            return np.char.add(np.char.add('"', values), '"').tolist()
+        return values.astype(str).tolist()
+
+    def write_parquet(self, out_dir, tables=None):
+        """Write one Parquet file per table (requires pyarrow)"""
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet output: pip install pyarrow")
+        os.makedirs(out_dir, exist_ok=True)
+        paths = {}
+        for table in tables or BASE_ROWS:
+            path = os.path.join(out_dir, f'{table}.parquet')
+            writer = None
+            try:
+                for chunk in self.generate(table):
+                    batch = pa.Table.from_pydict(chunk)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, batch.schema)
+                    writer.write_table(batch)
+            finally:
+                if writer is not None:
+                    writer.close()
+            paths[table] = path
+            print(f"✅ Wrote {self.row_counts[table]:,} rows to {path}")
+        return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic financial data files")
+    parser.add_argument('--scale', type=float, default=1.0, help="scale factor (1 = demo dataset)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--out', default='mock_data')
+    args = parser.parse_args()
+
+    generator = MockDataGenerator(args.scale, seed=args.seed, chunk_size=args.chunk_size)
+    if args.format == 'parquet':
+        generator.write_parquet(args.out)
+    else:
+        generator.write_csv(args.out)
@@ -0,0 +1,154 @@
+import math
+import numbers
+from decimal import Decimal
+from datetime import date, datetime
+
+import numpy as np
+
+from columnar import ColumnarResult
+
+
+TIME_COLUMNS = ('day', 'week', 'month', 'quarter', 'date')
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return (len(text or '') + 3) // 4
+
+
+def format_value(value):
+    """Short, unambiguous text for one cell"""
+    if isinstance(value, np.datetime64):
+        value = value.astype('datetime64[us]').item()
+    elif isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, Decimal):
+        value = float(value)
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if value.time() == datetime.min.time():
+            return value.date().isoformat()
+        return value.isoformat(timespec='minutes')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ''
+        if value.is_integer():
+            return str(int(value))
+        return f"{value:.4f}".rstrip('0').rstrip('.')
+    # Keep the row/column separators unambiguous
+    return str(value).replace('|', '/').replace('\n', ' ')
+
+
+def _is_table(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(row, dict) for row in value)
+
+
+def encode_table(rows):
+    """Header line plus one pipe-separated line per row"""
+    columns = list(rows[0])
+    for row in rows[1:]:
+        columns.extend(key for key in row if key not in columns)
+    lines = ['|'.join(columns)]
+    lines.extend('|'.join(format_value(row.get(column)) for column in columns) for row in rows)
+    return '\n'.join(lines)
+
+
+def _numeric(values):
+    # Decimal comes from psycopg2 cursors, streamed rows and incremental aggregates
+    return all(isinstance(v, numbers.Number) and not isinstance(v, (bool, np.bool_)) for v in values if v is not None)
+
+
+def _number(value):
+    """Float for arithmetic across int, float, NumPy and Decimal cells (None counts as 0)"""
+    return float(value) if value is not None else 0.0
+
+
+def summarize_table(rows, top_n=5, max_periods=12):
+    """Totals, per-period series with period-over-period deltas, and top-N dimension values"""
+    columns = list(rows[0])
+    time_column = next((c for c in columns if c in TIME_COLUMNS), None)
+    measures = [c for c in columns if c != time_column and _numeric([row.get(c) for row in rows])]
+    dimensions = [c for c in columns if c != time_column and c not in measures]
+
+    lines = [f"rows: {len(rows)} (summarized)"]
+    if not measures:
+        lines.append(encode_table(rows[:top_n]))
+        return '\n'.join(lines)
+
+    totals = {m: sum(_number(row.get(m)) for row in rows) for m in measures}
+    lines.append('totals: ' + ', '.join(f"{m}={format_value(totals[m])}" for m in measures))
+    lines.append('ranges: ' + ', '.join(
+        f"{m}={format_value(min(_number(row.get(m)) for row in rows))}..{format_value(max(_number(row.get(m)) for row in rows))}"
+        for m in measures
+    ))
+
+    primary = measures[0]
+    if time_column:
+        series = {}
+        for row in rows:
+            period = format_value(row.get(time_column))
+            series[period] = series.get(period, 0) + _number(row.get(primary))
+        periods = sorted(series)[-max_periods:]
+        lines.append(f"{primary} by {time_column}: " + ', '.join(
+            f"{p}={format_value(series[p])}" for p in periods
+        ))
+        deltas = []
+        for previous, current in zip(periods, periods[1:]):
+            if series[previous]:
+                deltas.append(f"{current}={(series[current] - series[previous]) / series[previous]:+.1%}")
+        if deltas:
+            lines.append(f"{primary} change vs prior {time_column}: " + ', '.join(deltas))
+
+    for dimension in dimensions:
+        by_value = {}
+        for row in rows:
+            key = format_value(row.get(dimension))
+            by_value[key] = by_value.get(key, 0) + _number(row.get(primary))
+        ranked = sorted(by_value.items(), key=lambda item: item[1], reverse=True)
+        total = sum(by_value.values()) or 1
+        lines.append(f"top {dimension} by {primary}: " + ', '.join(
+            f"{name}={format_value(value)} ({value / total:.0%})" for name, value in ranked[:top_n]
+        ) + (f", +{len(ranked) - top_n} more" if len(ranked) > top_n else ''))
+
+    return '\n'.join(lines)
+
+
+def _encode(data, summarize, top_n, indent=''):
+    if isinstance(data, ColumnarResult):
+        data = data.to_records()
+    if _is_table(data):
+        if summarize and len(data) > top_n:
+            text = summarize_table(data, top_n)
+        else:
+            text = encode_table(data)
+        return '\n'.join(indent + line for line in text.split('\n'))
+    if isinstance(data, dict):
+        lines = []
+        for key, value in data.items():
+            if isinstance(value, (dict, list, ColumnarResult)):
+                lines.append(f"{indent}{key}:")
+                lines.append(_encode(value, summarize, top_n, indent + '  '))
+            else:
+                lines.append(f"{indent}{key}: {format_value(value)}")
+        return '\n'.join(lines)
+    if isinstance(data, list):
+        return indent + (', '.join(format_value(item) for item in data) or '(none)')
+    return indent + format_value(data)
+
+
+def encode_data(data, token_budget=None, top_n=5):
+    """Compact prompt text for report data: (text, estimated_tokens, summarized)
+
+    Tables (lists of row dicts) become a header line plus pipe-separated rows.
+    When the full encoding exceeds token_budget, tables longer than top_n rows
+    are replaced by summary statistics instead.
+    """
+    text = _encode(data, False, top_n)
+    tokens = estimate_tokens(text)
+    if token_budget and tokens > token_budget:
+        text = _encode(data, True, top_n)
+        return text, estimate_tokens(text), True
+    return text, tokens, False
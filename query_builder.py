@@ -0,0 +1,206 @@
+import re
+from datetime import date, datetime
+
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter')
+
+_IDENTIFIER = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+# Parameterizable versions of RedshiftFinancialAgent.sql_queries. Each source
+# maps filter parameters to the columns that can serve them; a filter missing
+# from a source means that source cannot answer the request.
+TEMPLATE_SPECS = {
+    'monthly_revenue': {
+        'time_series': True,
+        'default_window': '12 months',
+        'dimensions': ['region'],
+        'sources': {
+            'raw': {
+                'table': 'sales_transactions',
+                'date_column': 'transaction_date',
+                'dimensions': {'region': 'region'},
+                'measures': [('SUM(amount)', 'revenue')],
+                'filters': {'region': 'region'}
+            },
+            'rollup': {
+                'table': 'rollup_daily_revenue',
+                'date_column': 'day',
+                'dimensions': {'region': 'region'},
+                'measures': [('SUM(revenue)', 'revenue')],
+                'filters': {'region': 'region'}
+            }
+        }
+    },
+    'expense_breakdown': {
+        'time_series': True,
+        'default_window': '12 months',
+        'dimensions': ['category'],
+        'sources': {
+            'raw': {
+                'table': 'expenses',
+                'date_column': 'expense_date',
+                'dimensions': {'category': 'category'},
+                'measures': [('SUM(amount)', 'total_expense')],
+                'filters': {'category': 'category'}
+            },
+            'rollup': {
+                'table': 'rollup_daily_expense',
+                'date_column': 'day',
+                'dimensions': {'category': 'category'},
+                'measures': [('SUM(total_expense)', 'total_expense')],
+                'filters': {'category': 'category'}
+            }
+        }
+    },
+    'customer_metrics': {
+        'time_series': True,
+        'default_window': '12 months',
+        'dimensions': [],
+        'sources': {
+            'raw': {
+                'table': 'customers',
+                'date_column': 'first_purchase_date',
+                'dimensions': {},
+                'measures': [('COUNT(DISTINCT customer_id)', 'new_customers'),
+                             ('AVG(lifetime_value)', 'avg_ltv')],
+                'filters': {'region': 'region'}
+            }
+        }
+    },
+    'product_performance': {
+        'time_series': False,
+        'default_window': '3 months',
+        'dimensions': ['product_category'],
+        'order_by': 'total_revenue DESC',
+        'sources': {
+            'raw': {
+                'table': 'product_sales',
+                'date_column': 'sale_date',
+                'dimensions': {'product_category': 'product_category'},
+                'measures': [('SUM(quantity_sold)', 'units_sold'),
+                             ('SUM(revenue)', 'total_revenue'),
+                             ('AVG(profit_margin)', 'avg_margin')],
+                'filters': {'category': 'product_category'}
+            }
+        }
+    }
+}
+
+FILTER_PARAMS = ('start_date', 'end_date', 'region', 'category', 'granularity')
+
+
+def _identifier(name):
+    """Reject anything that is not a plain lower-case SQL identifier"""
+    if not isinstance(name, str) or not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
+def _as_date(value, name):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"{name} must be a date or YYYY-MM-DD string, got {value!r}")
+
+
+def _as_values(value, name):
+    values = tuple(value) if isinstance(value, (list, tuple, set)) else (value,)
+    if not values or not all(isinstance(v, str) and v for v in values):
+        raise ValueError(f"{name} must be a non-empty string or list of strings")
+    return values
+
+
+def normalize_filters(filters):
+    """Validate filter parameters, dropping unset ones"""
+    filters = {key: value for key, value in (filters or {}).items() if value not in (None, '', [])}
+    unknown = set(filters) - set(FILTER_PARAMS)
+    if unknown:
+        raise ValueError(f"Unsupported query parameters: {', '.join(sorted(unknown))}")
+    if 'granularity' in filters and filters['granularity'] not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    for key in ('start_date', 'end_date'):
+        if key in filters:
+            filters[key] = _as_date(filters[key], key)
+    for key in ('region', 'category'):
+        if key in filters:
+            filters[key] = _as_values(filters[key], key)
+    if 'start_date' in filters and 'end_date' in filters and filters['start_date'] > filters['end_date']:
+        raise ValueError("start_date must not be after end_date")
+    return filters
+
+
+def supports(query_name, filters, source='raw'):
+    """Whether a source can answer a template with these filters"""
+    spec = TEMPLATE_SPECS.get(query_name)
+    if not spec or source not in spec['sources']:
+        return False
+    source_filters = spec['sources'][source]['filters']
+    return all(key in source_filters for key in ('region', 'category') if key in filters)
+
+
+def build_query(query_name, filters=None, source='raw'):
+    """Return (sql, params) for a template with filters pushed down into Redshift
+
+    Dates, regions and categories are bound parameters; granularity and every
+    interpolated identifier are checked against whitelists.
+    """
+    spec = TEMPLATE_SPECS.get(query_name)
+    if spec is None:
+        raise ValueError(f"Unknown query template: {query_name}")
+    if source not in spec['sources']:
+        raise ValueError(f"Template {query_name} has no {source} source")
+    filters = normalize_filters(filters)
+    src = spec['sources'][source]
+
+    table = _identifier(src['table'])
+    date_column = _identifier(src['date_column'])
+    params = {}
+
+    where = []
+    if 'start_date' in filters:
+        where.append(f"{date_column} >= %(start_date)s")
+        params['start_date'] = filters['start_date']
+    else:
+        where.append(f"{date_column} >= CURRENT_DATE - INTERVAL '{spec['default_window']}'")
+    if 'end_date' in filters:
+        where.append(f"{date_column} <= %(end_date)s")
+        params['end_date'] = filters['end_date']
+    for key in ('region', 'category'):
+        if key not in filters:
+            continue
+        column = src['filters'].get(key)
+        if column is None:
+            raise ValueError(f"Template {query_name} ({source}) does not support a {key} filter")
+        where.append(f"{_identifier(column)} IN %({key})s")
+        params[key] = filters[key]
+
+    select = []
+    if spec['time_series']:
+        # The bucket column is always named month, whatever its granularity, so
+        # consumers of the default queries keep working; callers report the
+        # granularity alongside the rows
+        granularity = filters.get('granularity', 'month')
+        select.append(f"DATE_TRUNC('{granularity}', {date_column}) as month")
+    elif 'granularity' in filters:
+        raise ValueError(f"Template {query_name} does not support granularity")
+    for output in spec['dimensions']:
+        select.append(f"{_identifier(src['dimensions'][output])} as {_identifier(output)}")
+    for expression, alias in src['measures']:
+        select.append(f"{expression} as {_identifier(alias)}")
+
+    group_count = len(spec['dimensions']) + (1 if spec['time_series'] else 0)
+    group_by = ', '.join(str(i) for i in range(1, group_count + 1))
+    order_by = spec.get('order_by') or group_by
+
+    sql = (
+        f"SELECT {', '.join(select)} "
+        f"FROM {table} "
+        f"WHERE {' AND '.join(where)} "
+        f"GROUP BY {group_by} "
+        f"ORDER BY {order_by}"
+    )
+    return sql, params
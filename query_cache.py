@@ -0,0 +1,164 @@
+import os
+import re
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from datetime import date
+
+import sqlite_store
+
+
+class QueryResultCache:
+    """Persistent SQLite cache for query results, keyed by freshness bucket"""
+
+    def __init__(self, path=None, default_ttl=None, ttls=None):
+        self.path = path or os.getenv('QUERY_CACHE_PATH', 'query_cache.db')
+        self.default_ttl = default_ttl if default_ttl is not None else int(os.getenv('QUERY_CACHE_TTL', '900'))
+        self.ttls = dict(ttls or {})
+
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0}
+        self._query_stats = {}
+
+        self._db = None
+        if self.path:
+            self._db = sqlite_store.connect(self.path, """
+                CREATE TABLE IF NOT EXISTS query_results (
+                    key TEXT PRIMARY KEY,
+                    query_name TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    result BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_query_results_name ON query_results (query_name);
+            """, label='Query cache', fallback='querying Redshift every time', wal=True,
+               migrate=self._migrate)
+
+    @staticmethod
+    def _migrate(db):
+        columns = [row[1] for row in db.execute("PRAGMA table_info(query_results)")]
+        if columns and 'params' not in columns:
+            # Cache files from before parameterized queries; contents are disposable
+            db.execute("DROP TABLE query_results")
+
+    @staticmethod
+    def normalize_sql(sql):
+        """Collapse whitespace so formatting changes don't change the key"""
+        return re.sub(r'\s+', ' ', sql or '').strip()
+
+    def ttl_for(self, query_name):
+        return self.ttls.get(query_name, self.default_ttl)
+
+    def freshness_bucket(self, query_name, now=None):
+        """Calendar date plus TTL window; rolling-window SQL changes with CURRENT_DATE"""
+        now = time.time() if now is None else now
+        ttl = self.ttl_for(query_name)
+        window = int(now // ttl) if ttl else 0
+        return f"{date.fromtimestamp(now).isoformat()}:{window}"
+
+    @staticmethod
+    def params_key(params):
+        return json.dumps(params or {}, sort_keys=True, default=str)
+
+    def make_key(self, query_name, sql, params=None, now=None):
+        sql_hash = hashlib.sha256(self.normalize_sql(sql).encode('utf-8')).hexdigest()
+        payload = json.dumps(
+            [query_name, sql_hash, self.params_key(params), self.freshness_bucket(query_name, now)]
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _count(self, query_name, stat):
+        self._stats[stat] += 1
+        per_query = self._query_stats.setdefault(query_name, {'hits': 0, 'misses': 0})
+        if stat in per_query:
+            per_query[stat] += 1
+
+    def get(self, query_name, sql, params=None):
+        """Cached result for the current freshness bucket, or None"""
+        if self._db is None or not self.ttl_for(query_name):
+            return None
+        key = self.make_key(query_name, sql, params)
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT result, expires_at FROM query_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or row[1] <= time.time():
+                    self._count(query_name, 'misses')
+                    return None
+                self._count(query_name, 'hits')
+            return pickle.loads(row[0])
+        except (sqlite3.Error, pickle.PickleError) as e:
+            print(f"⚠️ Query cache read failed: {e}")
+            return None
+
+    def get_latest(self, query_name, params=None):
+        """Most recently stored result for a query regardless of freshness"""
+        if self._db is None:
+            return None
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT result FROM query_results WHERE query_name = ? AND params = ? "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (query_name, self.params_key(params))
+                ).fetchone()
+            return pickle.loads(row[0]) if row else None
+        except (sqlite3.Error, pickle.PickleError) as e:
+            print(f"⚠️ Query cache read failed: {e}")
+            return None
+
+    def set(self, query_name, sql, result, params=None):
+        """Store a result under the current freshness bucket"""
+        ttl = self.ttl_for(query_name)
+        if self._db is None or not ttl:
+            return
+        now = time.time()
+        key = self.make_key(query_name, sql, params, now)
+        try:
+            blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_results VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, query_name, self.params_key(params), blob, now, now + ttl)
+                )
+                # Keep only the newest entry per query and parameters (stale fallback)
+                self._db.execute("""
+                    DELETE FROM query_results
+                    WHERE query_name = ? AND params = ? AND expires_at <= ? AND key != ?
+                """, (query_name, self.params_key(params), now, key))
+                self._db.commit()
+                self._stats['stores'] += 1
+        except (sqlite3.Error, pickle.PickleError) as e:
+            print(f"⚠️ Query cache write failed: {e}")
+
+    def invalidate(self, query_name=None):
+        """Drop cached results for one query, or all queries"""
+        if self._db is None:
+            return 0
+        with self._lock:
+            if query_name is None:
+                deleted = self._db.execute("DELETE FROM query_results").rowcount
+            else:
+                deleted = self._db.execute(
+                    "DELETE FROM query_results WHERE query_name = ?", (query_name,)
+                ).rowcount
+            self._db.commit()
+            self._stats['invalidations'] += 1
+        return deleted
+
+    def stats(self):
+        """Hit-rate metrics, overall and per query"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['per_query'] = {name: dict(values) for name, values in self._query_stats.items()}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        for values in stats['per_query'].values():
+            total = values['hits'] + values['misses']
+            values['hit_rate'] = values['hits'] / total if total else 0.0
+        return stats
@@ -1,50 +1,275 @@
-import json
 import os
-from datetime import datetime, timedelta
+import json
+import time
+import random
+import asyncio
+import threading
+from datetime import datetime
+
+from registry import Registry
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class DailyBudgetExceeded(Exception):
+    """The daily token budget cannot cover the request"""
+
+
+class RateLimitTimeout(Exception):
+    """The limiter could not admit the request within max_wait seconds"""
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute token buckets plus a daily token budget
+
+    Callers reserve an estimate before an LLM call and settle the actual
+    response.usage afterwards; over-runs leave the token bucket in debt so the
+    next callers wait. State lives in a JSON file guarded by flock, so every
+    process sharing the file shares the limits. Without fcntl (or with an
+    empty path) the state is kept in memory for this process only.
+    """
+
+    def __init__(self, path=None, requests_per_minute=None, tokens_per_minute=None,
+                 daily_token_budget=None, max_wait=None):
+        self.path = path if path is not None else os.getenv('LLM_RATE_LIMIT_PATH', 'rate_limit_state.json')
+        if fcntl is None or not self.path:
+            self.path = None
+        self.requests_per_minute = requests_per_minute or int(os.getenv('LLM_RPM_LIMIT', '60'))
+        self.tokens_per_minute = tokens_per_minute or int(os.getenv('LLM_TPM_LIMIT', '40000'))
+        # 0 disables the daily budget
+        self.daily_token_budget = (daily_token_budget if daily_token_budget is not None
+                                   else int(os.getenv('LLM_DAILY_TOKEN_BUDGET', '0')))
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv('LLM_RATE_LIMIT_MAX_WAIT', '120'))
+
+        self._lock = threading.Lock()
+        self._state = None
+        self._stats = {'admitted': 0, 'waits': 0, 'wait_seconds': 0.0, 'timeouts': 0, 'budget_rejections': 0}
+
+    def _fresh_state(self, now):
+        return {
+            'requests': float(self.requests_per_minute),
+            'tokens': float(self.tokens_per_minute),
+            'updated_at': now,
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'tokens_used': 0,
+            'requests_made': 0
+        }
+
+    def _refill(self, state, now):
+        elapsed = max(0.0, now - state['updated_at'])
+        state['requests'] = min(self.requests_per_minute, state['requests'] + elapsed * self.requests_per_minute / 60)
+        state['tokens'] = min(self.tokens_per_minute, state['tokens'] + elapsed * self.tokens_per_minute / 60)
+        state['updated_at'] = now
+        today = datetime.now().strftime('%Y-%m-%d')
+        if state['date'] != today:
+            state.update(date=today, tokens_used=0, requests_made=0)
+
+    def _parse(self, text, now):
+        try:
+            loaded = json.loads(text or '{}')
+        except ValueError:
+            loaded = {}
+        # Also accepts the older daily-only quota file format
+        state = dict(self._fresh_state(now), **loaded)
+        self._refill(state, now)
+        return state
+
+    def _read(self):
+        """Copy of the current state under a shared flock, leaving the file untouched"""
+        with self._lock:
+            now = time.time()
+            if self.path is None:
+                if self._state is None:
+                    self._state = self._fresh_state(now)
+                self._refill(self._state, now)
+                return dict(self._state)
+
+            try:
+                with open(self.path) as f:
+                    fcntl.flock(f, fcntl.LOCK_SH)
+                    try:
+                        text = f.read()
+                    finally:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            except FileNotFoundError:
+                text = ''
+            return self._parse(text, now)
+
+    def _update(self, fn):
+        """Apply fn(state) under the thread lock and, when persisted, an exclusive flock"""
+        with self._lock:
+            now = time.time()
+            if self.path is None:
+                if self._state is None:
+                    self._state = self._fresh_state(now)
+                self._refill(self._state, now)
+                return fn(self._state)
+
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, 'r+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    state = self._parse(f.read(), now)
+                    result = fn(state)
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            return result
+
+    def try_acquire(self, tokens):
+        """Reserve one request and `tokens` tokens; returns 0 if admitted, else seconds to wait"""
+        tokens = max(0, int(tokens))
+
+        def reserve(state):
+            if self.daily_token_budget and state['tokens_used'] + tokens > self.daily_token_budget:
+                raise DailyBudgetExceeded(
+                    f"Daily token budget exhausted ({state['tokens_used']:,}/{self.daily_token_budget:,} used)"
+                )
+            # A request larger than the whole bucket only needs a full bucket
+            needed = min(tokens, self.tokens_per_minute)
+            if state['requests'] >= 1 and state['tokens'] >= needed:
+                state['requests'] -= 1
+                state['tokens'] -= tokens
+                state['tokens_used'] += tokens
+                state['requests_made'] += 1
+                return 0.0
+            request_wait = max(0.0, 1 - state['requests']) * 60 / self.requests_per_minute
+            token_wait = max(0.0, needed - state['tokens']) * 60 / self.tokens_per_minute
+            return max(request_wait, token_wait)
+
+        try:
+            return self._update(reserve)
+        except DailyBudgetExceeded:
+            with self._lock:
+                self._stats['budget_rejections'] += 1
+            raise
+
+    def _waited(self, start, wait, max_wait, slept):
+        """Record an admission, or fail if the next wait would exceed max_wait"""
+        waited = time.monotonic() - start
+        with self._lock:
+            if not wait:
+                self._stats['admitted'] += 1
+                if slept:
+                    self._stats['waits'] += 1
+                    self._stats['wait_seconds'] += waited
+            elif waited + wait > max_wait:
+                self._stats['timeouts'] += 1
+                raise RateLimitTimeout(f"LLM rate limit: no capacity within {max_wait:g}s")
+        return waited
+
+    def acquire(self, tokens, max_wait=None):
+        """Block until the request is admitted; raises RateLimitTimeout after max_wait seconds"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        start = time.monotonic()
+        slept = False
+        while True:
+            wait = self.try_acquire(tokens)
+            waited = self._waited(start, wait, max_wait, slept)
+            if not wait:
+                return waited
+            # Jitter keeps queued callers from retrying in lockstep
+            time.sleep(wait * random.uniform(1.0, 1.2))
+            slept = True
+
+    async def acquire_async(self, tokens, max_wait=None):
+        """acquire() for coroutines: waits with asyncio.sleep instead of blocking the loop"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        start = time.monotonic()
+        slept = False
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, tokens)
+            waited = self._waited(start, wait, max_wait, slept)
+            if not wait:
+                return waited
+            await asyncio.sleep(wait * random.uniform(1.0, 1.2))
+            slept = True
+
+    def settle(self, reserved_tokens, actual_tokens, requests=0):
+        """Charge actual response.usage tokens against an earlier reservation
+
+        requests counts calls made without a reservation, so that
+        requests_today still includes them.
+        """
+        delta = int(actual_tokens or 0) - max(0, int(reserved_tokens))
+
+        def charge(state):
+            state['tokens'] = min(self.tokens_per_minute, state['tokens'] - delta)
+            state['tokens_used'] = max(0, state['tokens_used'] + delta)
+            state['requests_made'] += requests
+
+        if delta or requests:
+            self._update(charge)
+
+    def call(self, compute_fn, estimated_tokens):
+        """Run compute_fn() -> (result, total_tokens) once admitted, charging its actual usage"""
+        self.acquire(estimated_tokens)
+        tokens = 0
+        try:
+            result, tokens = compute_fn()
+            return result, tokens
+        finally:
+            self.settle(estimated_tokens, tokens)
+
+    async def acall(self, compute_fn, estimated_tokens):
+        """call() for a coroutine function compute_fn"""
+        await self.acquire_async(estimated_tokens)
+        tokens = 0
+        try:
+            result, tokens = await compute_fn()
+            return result, tokens
+        finally:
+            await asyncio.to_thread(self.settle, estimated_tokens, tokens)
+
+    @staticmethod
+    def estimate_tokens(*texts, max_tokens=0):
+        """Rough prompt size (about four characters per token) plus the completion allowance"""
+        return sum(len(text or '') for text in texts) // 4 + max_tokens
+
+    def stats(self):
+        """Bucket levels, daily usage and wait metrics"""
+        snapshot = self._read()
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(
+            requests_available=snapshot['requests'],
+            tokens_available=snapshot['tokens'],
+            tokens_used_today=snapshot['tokens_used'],
+            requests_today=snapshot['requests_made'],
+            daily_token_budget=self.daily_token_budget
+        )
+        return stats
+
+
+_limiters = Registry()
+
+
+def get_rate_limiter(name='openai', **kwargs):
+    """Process-wide limiter shared by every caller using the same name"""
+    return _limiters.get(name, lambda: RateLimiter(**kwargs))
+
 
 class QuotaManager:
-    def __init__(self, quota_file="quota_usage.json"):
-        self.quota_file = quota_file
-        self.daily_limit = 1000  # tokens
-        self.load_usage()
-    
-    def load_usage(self):
-        """Load usage data from file"""
-        if os.path.exists(self.quota_file):
-            with open(self.quota_file, 'r') as f:
-                self.usage_data = json.load(f)
-        else:
-            self.usage_data = {
-                'date': datetime.now().strftime('%Y-%m-%d'),
-                'tokens_used': 0,
-                'requests_made': 0
-            }
-    
-    def save_usage(self):
-        """Save usage data to file"""
-        with open(self.quota_file, 'w') as f:
-            json.dump(self.usage_data, f)
-    
+    """Daily token quota view over RateLimiter, kept for existing callers"""
+
+    def __init__(self, quota_file="quota_usage.json", daily_limit=1000):
+        self.limiter = RateLimiter(path=quota_file, daily_token_budget=daily_limit)
+        self.daily_limit = daily_limit
+
     def can_make_request(self, estimated_tokens=100):
         """Check if request can be made within quota"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        
-        # Reset if new day
-        if self.usage_data['date'] != today:
-            self.usage_data = {
-                'date': today,
-                'tokens_used': 0,
-                'requests_made': 0
-            }
-        
-        return (self.usage_data['tokens_used'] + estimated_tokens) <= self.daily_limit
-    
+        return self.get_remaining_quota() >= estimated_tokens
+
     def record_usage(self, tokens_used):
         """Record token usage"""
-        self.usage_data['tokens_used'] += tokens_used
-        self.usage_data['requests_made'] += 1
-        self.save_usage()
-    
+        self.limiter.settle(0, tokens_used, requests=1)
+
     def get_remaining_quota(self):
         """Get remaining quota for today"""
-        return max(0, self.daily_limit - self.usage_data['tokens_used'])
\ No newline at end of file
+        return max(0, self.daily_limit - self.limiter.stats()['tokens_used_today'])
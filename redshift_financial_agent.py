@@ -1,5 +1,7 @@
 import os
 import json
+import uuid
+import hashlib
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from openai import OpenAI
@@ -8,18 +10,44 @@ from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import PolynomialFeatures
 from sklearn.metrics import mean_absolute_error, r2_score
 import warnings
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 warnings.filterwarnings('ignore')
 
 # Uncomment these for actual Redshift connection
 import psycopg2
 import pandas as pd
 
+from connection_pool import RedshiftConnectionPool
+from llm_cache import LLMResponseCache
+from columnar import ColumnarResult
+from query_cache import QueryResultCache
+from incremental_refresh import IncrementalAggregateStore, INCREMENTAL_TEMPLATES
+from rollups import ROLLUP_ROUTES, rollup_ages
+from circuit_breaker import get_breaker
+from query_builder import TEMPLATE_SPECS, build_query, normalize_filters, supports
+from quota_manager import get_rate_limiter
+from llm_calls import HedgedLLMCaller
+from prompt_encoder import encode_data
+
 load_dotenv()
 
+# Report sections servable on their own: source query, report key, and the
+# column summed into the section total (under the given name)
+REPORT_SECTIONS = {
+    'revenue': {'query': 'monthly_revenue', 'key': 'revenue_data', 'total': ('revenue', 'total_revenue')},
+    'expenses': {'query': 'expense_breakdown', 'key': 'expense_data', 'total': ('total_expense', 'total_expenses')},
+    'customers': {'query': 'customer_metrics', 'key': 'customer_data', 'total': ('new_customers', 'total_new_customers')},
+    'products': {'query': 'product_performance', 'key': 'product_data', 'total': ('total_revenue', 'total_revenue')}
+}
+
 class RedshiftFinancialAgent:
     def __init__(self, name="RedshiftAnalyst"):
         self.name = name
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        # Retries are handled by llm_caller, not the client
+        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
         
         # Redshift connection parameters
         self.redshift_config = {
@@ -30,6 +58,69 @@ class RedshiftFinancialAgent:
             'password': os.getenv('REDSHIFT_PASSWORD')
         }
         
+        # Connection attempts fail fast while Redshift is known to be unreachable
+        self.connect_timeout = int(os.getenv('REDSHIFT_CONNECT_TIMEOUT', '5'))
+        self.connect_retries = int(os.getenv('REDSHIFT_CONNECT_RETRIES', '1'))
+        self.breaker = get_breaker(
+            'redshift',
+            failure_threshold=int(os.getenv('REDSHIFT_BREAKER_FAILURES', '1')),
+            reset_timeout=int(os.getenv('REDSHIFT_BREAKER_RESET', '15')),
+            max_reset_timeout=int(os.getenv('REDSHIFT_BREAKER_MAX_RESET', '300'))
+        )
+        
+        # Pooled connections shared by all queries issued through this agent
+        self.pool = RedshiftConnectionPool(
+            self.connect_to_redshift,
+            max_size=int(os.getenv('REDSHIFT_POOL_SIZE', '5')),
+            max_lifetime=int(os.getenv('REDSHIFT_POOL_MAX_LIFETIME', '1800')),
+            max_idle=int(os.getenv('REDSHIFT_POOL_MAX_IDLE', '300')),
+            checkout_timeout=int(os.getenv('REDSHIFT_POOL_CHECKOUT_TIMEOUT', '30'))
+        )
+        
+        # Maximum number of report queries issued concurrently
+        self.query_workers = int(os.getenv('REPORT_QUERY_WORKERS', '4'))
+        
+        # Query results are reused until their freshness bucket rolls over
+        self.query_cache = QueryResultCache()
+        
+        # Rolling-window aggregates can be refreshed from a one-month delta
+        self.incremental_refresh = os.getenv('INCREMENTAL_REFRESH', 'false').lower() == 'true'
+        self.aggregate_store = IncrementalAggregateStore() if self.incremental_refresh else None
+        
+        # Opt-in: templates are served from rollup tables while their last refresh is recent
+        self.rollup_routing = os.getenv('ROLLUP_ROUTING', 'false').lower() == 'true'
+        self.rollup_max_age = int(os.getenv('ROLLUP_MAX_AGE', '3600'))
+        self.rollup_status_ttl = 60
+        self._rollup_status = {'checked_at': 0.0, 'ages': {}}
+        self._rollup_lock = threading.Lock()
+        
+        # Rows fetched per round trip when streaming large extracts
+        self.stream_fetch_size = int(os.getenv('REDSHIFT_STREAM_FETCH_SIZE', '10000'))
+        
+        # LLM calls share a bounded executor; slow calls time out individually
+        self.llm_concurrency = int(os.getenv('LLM_MAX_CONCURRENCY', '3'))
+        self.llm_timeout = float(os.getenv('LLM_CALL_TIMEOUT', '30'))
+        self.llm_executor = ThreadPoolExecutor(max_workers=self.llm_concurrency, thread_name_prefix='llm-call')
+        
+        # Prompt data over this many estimated tokens is sent as summary statistics
+        self.prompt_token_budget = int(os.getenv('PROMPT_TOKEN_BUDGET', '1500'))
+        
+        # Ask for all report insights in one JSON-structured request
+        self.combined_insights = os.getenv('LLM_COMBINED_INSIGHTS', 'false').lower() == 'true'
+        
+        # Identical prompts (unchanged data) are answered from cache
+        self.llm_cache = LLMResponseCache()
+        
+        # Client-side RPM/TPM shaping and daily budget, shared across processes
+        self.rate_limiter = get_rate_limiter('openai')
+        
+        # Each completion gets a deadline, 429/5xx retries and a hedge past p95 latency
+        self.llm_caller = HedgedLLMCaller(deadline=self.llm_timeout)
+        
+        # Sections queried for the comprehensive report and the forecasts
+        self.report_queries = ['monthly_revenue', 'expense_breakdown', 'customer_metrics', 'product_performance']
+        self.prediction_queries = ['monthly_revenue', 'expense_breakdown', 'customer_metrics']
+        
         # SQL query templates
         self.sql_queries = {
             'monthly_revenue': """
@@ -79,11 +170,13 @@ class RedshiftFinancialAgent:
         }
     
     def connect_to_redshift(self):
-        """Establish connection to Redshift with timeout and retry"""
-        import time
+        """Establish connection to Redshift with timeout, retry and circuit breaker"""
+        if not self.breaker.allow_request():
+            print(f"⚡ Redshift circuit open, skipping connection (retry in {self.breaker.retry_after():.0f}s)")
+            return None
         
-        max_retries = 3
-        for attempt in range(max_retries):
+        attempts = self.connect_retries + 1
+        for attempt in range(attempts):
             try:
                 conn = psycopg2.connect(
                     host=self.redshift_config['host'],
@@ -91,54 +184,295 @@ class RedshiftFinancialAgent:
                     database=self.redshift_config['database'],
                     user=self.redshift_config['user'],
                     password=self.redshift_config['password'],
-                    connect_timeout=30  # 30 second timeout
+                    connect_timeout=self.connect_timeout
                 )
                 print(f"✅ Connected to Redshift successfully")
+                self.breaker.record_success()
                 return conn
             except psycopg2.OperationalError as e:
                 if "timeout" in str(e).lower():
-                    print(f"⚠️ Connection timeout (attempt {attempt + 1}/{max_retries})")
-                    if attempt < max_retries - 1:
-                        time.sleep(5)  # Wait 5 seconds before retry
+                    print(f"⚠️ Connection timeout (attempt {attempt + 1}/{attempts})")
+                    if attempt < attempts - 1:
+                        # Exponential backoff with jitter
+                        time.sleep(min(10, 2 ** attempt) * random.uniform(0.5, 1.5))
+                        # Another caller may have opened the circuit while we waited
+                        if self.breaker.state == self.breaker.OPEN:
+                            print(f"⚡ Redshift circuit opened, giving up on retries")
+                            return None
                         continue
                 print(f"❌ Network error: Check security groups and VPC settings")
                 print(f"Error details: {e}")
+                self.breaker.record_failure()
                 return None
             except Exception as e:
                 print(f"❌ Connection error: {e}")
+                self.breaker.record_failure()
                 return None
         
-        print(f"❌ Failed to connect after {max_retries} attempts")
+        print(f"❌ Failed to connect after {attempts} attempts")
+        self.breaker.record_failure()
         return None
         
         # # Mock connection for demo
         # print("🔗 Connected to Redshift (Mock)")
         # return "mock_connection"
     
-    def execute_query(self, query_name, custom_query=None):
-        """Execute SQL query against Redshift"""
-        conn = self.connect_to_redshift()
+    def execute_query(self, query_name, custom_query=None, stream=False, fetch_size=None, as_columns=False,
+                      columnar=False, use_cache=True, force_full_refresh=False, filters=None):
+        """Execute SQL query against Redshift
+        
+        filters (start_date, end_date, region, category, granularity) are
+        pushed down into the template as bound parameters; they cannot be
+        combined with custom_query. Returns a list of row dicts, or a
+        ColumnarResult when columnar is True.
+        """
+        filters = normalize_filters(filters)
+        if filters and custom_query:
+            raise ValueError("filters apply to query templates, not custom_query")
+        params = None
+        if filters:
+            query, params = build_query(query_name, filters)
+        else:
+            query = custom_query or self.sql_queries.get(query_name)
+        
+        if stream:
+            return self.stream_query(query_name, query, fetch_size=fetch_size, as_columns=as_columns, params=params)
+        
+        if not query:
+            print(f"❌ No query found for: {query_name}")
+            return ColumnarResult.from_records([]) if columnar else []
+        
+        if use_cache:
+            cached = self.query_cache.get(query_name, query, params)
+            if cached is not None:
+                print(f"⚡ Query cache hit: {query_name}")
+                return cached if columnar else cached.to_records()
+        
+        conn = self.pool.acquire()
+        if not conn:
+            return self._fallback_result(query_name, columnar, filters)
+        
+        failed = False
+        try:
+            rollup_sql, rollup_params = (None, None) if custom_query else self._rollup_route(conn, query_name, filters)
+            if rollup_sql:
+                print(f"🔍 Executing query: {query_name} (rollup {ROLLUP_ROUTES[query_name]['rollup']})")
+                df = pd.read_sql(rollup_sql, conn, params=rollup_params)
+                print(f"✅ Retrieved {len(df)} records from Redshift")
+                result = ColumnarResult.from_frame(df)
+            elif (self.incremental_refresh and not custom_query and not filters
+                    and query_name in INCREMENTAL_TEMPLATES):
+                result = self.aggregate_store.refresh(conn, query_name, force_full=force_full_refresh)
+                print(f"✅ Refreshed {len(result)} records incrementally")
+            else:
+                print(f"🔍 Executing query: {query_name}")
+                df = pd.read_sql(query, conn, params=params)
+                print(f"✅ Retrieved {len(df)} records from Redshift")
+                result = ColumnarResult.from_frame(df)
+            self.query_cache.set(query_name, query, result, params)
+            return result if columnar else result.to_records()
+        except Exception as e:
+            failed = self._connection_failed(conn, e)
+            if failed:
+                self.breaker.record_failure()
+            print(f"❌ Query execution error: {e}")
+            return self._fallback_result(query_name, columnar, filters)
+        finally:
+            self.pool.release(conn, discard=failed)
+    
+    @staticmethod
+    def _connection_failed(conn, error):
+        """True if error means the connection or Redshift itself failed, not just this query
+        
+        Only these count against the circuit breaker: a cancelled statement
+        (statement_timeout) or a bad query leaves Redshift perfectly reachable.
+        """
+        if conn.closed:
+            return True
+        # pandas wraps driver errors in its own DatabaseError
+        while error is not None and not isinstance(error, psycopg2.Error):
+            error = error.__cause__ or error.__context__
+        if isinstance(error, psycopg2.InterfaceError):
+            return True
+        if isinstance(error, psycopg2.OperationalError) and not isinstance(error, psycopg2.extensions.QueryCanceledError):
+            # Lost sockets carry no SQLSTATE; server-side: connection exception (08) or shutdown (57P)
+            return error.pgcode is None or error.pgcode.startswith(('08', '57P'))
+        return False
+    
+    def _fallback_result(self, query_name, columnar=False, filters=None):
+        """Last cached Redshift result for a query if any, otherwise mock data"""
+        if not filters:
+            cached = self.query_cache.get_latest(query_name)
+            if cached is not None:
+                print(f"⚠️ Serving last cached result for {query_name}")
+                return cached if columnar else cached.to_records()
+        print(f"⚠️ Using mock data for {query_name}")
+        return self._mock_result(query_name, columnar, filters)
+    
+    def _rollup_route(self, conn, query_name, filters=None):
+        """(sql, params) against a template's rollup if it is fresh, otherwise (None, None)"""
+        route = ROLLUP_ROUTES.get(query_name)
+        if not self.rollup_routing or not route or not supports(query_name, filters or {}, 'rollup'):
+            return None, None
+        
+        with self._rollup_lock:
+            if time.monotonic() - self._rollup_status['checked_at'] > self.rollup_status_ttl:
+                try:
+                    ages = rollup_ages(conn)
+                    conn.rollback()
+                except psycopg2.Error as e:
+                    # Rollups not installed (or log unreadable): use raw tables
+                    conn.rollback()
+                    print(f"⚠️ Rollup status unavailable, using raw tables: {str(e).strip()}")
+                    ages = {}
+                self._rollup_status = {'checked_at': time.monotonic(), 'ages': ages}
+            age = self._rollup_status['ages'].get(route['rollup'])
+            checked_at = self._rollup_status['checked_at']
+        
+        # Never older than a cached raw result is allowed to be
+        max_age = min(self.rollup_max_age, self.query_cache.ttl_for(query_name) or self.rollup_max_age)
+        if age is None or age + time.monotonic() - checked_at > max_age:
+            return None, None
+        if filters:
+            return build_query(query_name, filters, source='rollup')
+        return route['sql'], None
+    
+    def stream_query(self, query_name, custom_query=None, fetch_size=None, as_columns=False, params=None):
+        """Stream query results in batches through a named server-side cursor
+        
+        Yields lists of row dicts, or dicts of NumPy column arrays when
+        as_columns is True, so peak memory is bounded by fetch_size.
+        """
+        fetch_size = fetch_size or self.stream_fetch_size
+        conn = self.pool.acquire()
         if not conn:
             print(f"⚠️ Using mock data for {query_name}")
-            return self.get_mock_data(query_name)
+            yield from self._batches(self.get_mock_data(query_name), fetch_size, as_columns)
+            return
         
         query = custom_query or self.sql_queries.get(query_name)
         if not query:
             print(f"❌ No query found for: {query_name}")
-            return []
+            self.pool.release(conn)
+            return
         
+        failed = False
+        cursor = None
         try:
-            print(f"🔍 Executing query: {query_name}")
-            df = pd.read_sql(query, conn)
-            print(f"✅ Retrieved {len(df)} records from Redshift")
-            return df.to_dict('records')
-        except Exception as e:
-            print(f"❌ Query execution error: {e}")
-            print(f"⚠️ Falling back to mock data for {query_name}")
-            return self.get_mock_data(query_name)
+            print(f"🔍 Streaming query: {query_name} (fetch size {fetch_size})")
+            cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+            cursor.itersize = fetch_size
+            cursor.execute(query, params)
+            
+            columns = None
+            total = 0
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                if columns is None:
+                    columns = [col[0] for col in cursor.description]
+                total += len(rows)
+                if as_columns:
+                    yield {name: np.array(values) for name, values in zip(columns, zip(*rows))}
+                else:
+                    yield [dict(zip(columns, row)) for row in rows]
+            print(f"✅ Streamed {total} records from Redshift")
+        except psycopg2.Error as e:
+            failed = self._connection_failed(conn, e)
+            if failed:
+                self.breaker.record_failure()
+            print(f"❌ Streaming query error: {e}")
+            raise
         finally:
-            if conn:
-                conn.close()
+            if cursor is not None and not conn.closed:
+                try:
+                    cursor.close()
+                except psycopg2.Error:
+                    failed = True
+            self.pool.release(conn, discard=failed)
+    
+    def _batches(self, records, batch_size, as_columns=False):
+        """Split in-memory records into batches shaped like stream_query output"""
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            if as_columns:
+                yield {name: np.array([row[name] for row in batch]) for name in batch[0]}
+            else:
+                yield batch
+    
+    def execute_queries(self, query_names, max_workers=None, columnar=False):
+        """Execute independent queries concurrently, returning results in request order"""
+        workers = max(1, min(max_workers or self.query_workers, len(query_names)))
+        results = {}
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='redshift-query') as executor:
+            futures = [(name, executor.submit(self.execute_query, name, columnar=columnar)) for name in query_names]
+            for name, future in futures:
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"❌ Query {name} failed: {e}")
+                    results[name] = self._mock_result(name, columnar)
+        
+        return results
+    
+    def data_fingerprint(self, query_names=None):
+        """Hash of the current query results; unchanged data gives the same hash"""
+        results = self.execute_queries(query_names or self.report_queries, columnar=True)
+        payload = json.dumps(
+            {name: result.to_records() for name, result in results.items()}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def rebuild_aggregates(self, query_name=None):
+        """Force a full rebuild of incrementally refreshed aggregates"""
+        names = [query_name] if query_name else list(INCREMENTAL_TEMPLATES)
+        return {
+            name: self.execute_query(name, use_cache=False, force_full_refresh=True)
+            for name in names
+        }
+    
+    def invalidate_query_cache(self, query_name=None):
+        """Drop cached results for one query template, or all of them"""
+        return self.query_cache.invalidate(query_name)
+    
+    def get_query_cache_stats(self):
+        """Query result cache hit-rate metrics"""
+        return self.query_cache.stats()
+    
+    def get_llm_cache_stats(self):
+        """LLM response cache statistics (hits, misses, tokens saved)"""
+        return self.llm_cache.stats()
+    
+    def get_rate_limit_stats(self):
+        """LLM rate limiter bucket levels, daily usage and wait metrics"""
+        return self.rate_limiter.stats()
+    
+    def get_llm_call_stats(self):
+        """LLM retry, hedge and deadline counters"""
+        return self.llm_caller.stats()
+    
+    def get_breaker_stats(self):
+        """Redshift circuit breaker state and transition metrics"""
+        return self.breaker.stats()
+    
+    def get_pool_stats(self):
+        """Connection pool statistics (wait time, in-use, created, recycled)"""
+        return self.pool.stats()
+    
+    def close(self):
+        """Close pooled Redshift connections and background executors"""
+        self.llm_executor.shutdown(wait=False)
+        self.pool.close_all()
+    
+    def _mock_result(self, query_name, columnar=False, filters=None):
+        """Mock data in the requested result shape"""
+        data = self.get_mock_data(query_name)
+        for key, column in (('region', 'region'), ('category', 'category'), ('category', 'product_category')):
+            if filters and key in filters:
+                data = [row for row in data if column not in row or row[column] in filters[key]]
+        return ColumnarResult.from_records(data) if columnar else data
     
     def get_mock_data(self, query_name):
         """Mock data for demonstration"""
@@ -172,52 +506,185 @@ class RedshiftFinancialAgent:
         }
         return mock_datasets.get(query_name, [])
     
-    def generate_ai_analysis(self, data, analysis_type):
-        """Generate AI-powered financial analysis"""
-        # Convert Timestamp objects to strings for JSON serialization
-        def json_serializer(obj):
-            if hasattr(obj, 'isoformat'):
-                return obj.isoformat()
-            raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
-        
+    def _encode_data(self, data, label):
+        """Compact table text for a prompt, summarized when over the token budget"""
+        text, tokens, summarized = encode_data(data, self.prompt_token_budget)
+        print(f"🧮 {label} data: ~{tokens:,} prompt tokens{' (summarized)' if summarized else ''}")
+        return text
+    
+    def _analysis_request(self, data, analysis_type):
+        """Model, system prompt, user prompt and max_tokens for an analysis"""
         prompt = f"""
-        As a senior financial analyst, analyze this {analysis_type} data:
+        As a senior financial analyst, analyze this {analysis_type} data (tables are pipe-separated with a header row):
         
-        {json.dumps(data, indent=2, default=json_serializer)}
+        {self._encode_data(data, analysis_type)}
         
         Provide key trends and insights, performance drivers, risk factors, strategic recommendations, and forecast implications. Be specific and actionable. Format your response as clear, concise sentences without numbering.
         """
         
-        response = self.client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a CFO-level financial analyst with expertise in data-driven insights."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=500
+        model = "gpt-4"
+        system_prompt = "You are a CFO-level financial analyst with expertise in data-driven insights."
+        max_tokens = 500
+        return model, system_prompt, prompt, max_tokens
+    
+    def _combined_request(self, analyses):
+        """One prompt asking for every analysis as a key of a JSON object"""
+        sections = "\n\n".join(
+            f"{key} ({analysis_type} data):\n{self._encode_data(data, analysis_type)}"
+            for key, (data, analysis_type) in analyses.items()
         )
+        keys = ", ".join(f'"{key}"' for key in analyses)
+        prompt = f"""
+        As a senior financial analyst, analyze each of these report sections (tables are pipe-separated with a header row):
+        
+        {sections}
+        
+        For each section provide key trends and insights, performance drivers, risk factors, strategic recommendations, and forecast implications. Be specific and actionable. Sections named as summaries should synthesize the other sections rather than restate their data. Write clear, concise sentences without numbering.
+        
+        Respond with only a JSON object with exactly these keys, each holding that section's analysis as a string: {keys}
+        """
         
-        return response.choices[0].message.content
+        model = "gpt-4"
+        system_prompt = "You are a CFO-level financial analyst with expertise in data-driven insights. You reply with valid JSON only."
+        max_tokens = 400 * len(analyses)
+        return model, system_prompt, prompt, max_tokens
+    
+    @staticmethod
+    def _parse_combined(text, keys):
+        """Validate a combined JSON response and return {key: analysis}"""
+        text = (text or '').strip()
+        # Tolerate a fenced code block or prose around the object
+        start, end = text.find('{'), text.rfind('}')
+        if start < 0 or end < start:
+            raise ValueError("no JSON object in response")
+        parsed = json.loads(text[start:end + 1])
+        if not isinstance(parsed, dict):
+            raise ValueError("response is not a JSON object")
+        missing = [key for key in keys if not isinstance(parsed.get(key), str) or not parsed[key].strip()]
+        if missing:
+            raise ValueError(f"missing or empty sections: {', '.join(missing)}")
+        return {key: parsed[key].strip() for key in keys}
+    
+    def generate_combined_analyses(self, analyses, timeout=None, raise_errors=False, with_models=False):
+        """All analyses from one structured request, falling back to per-section calls
+        
+        Failed calls become "unavailable" placeholders unless raise_errors is
+        set, in which case the first failure is raised instead. with_models
+        adds a 'models' entry naming the model that answered each analysis.
+        """
+        model, system_prompt, prompt, max_tokens = self._combined_request(analyses)
+        try:
+            text, answered_by = self._complete(model, system_prompt, prompt, max_tokens, with_model=True)
+        except Exception as e:
+            print(f"❌ Combined AI analysis failed: {e}")
+            if raise_errors:
+                raise
+            results = {key: f"AI analysis unavailable: {e}" for key in analyses}
+            return dict(results, models={}) if with_models else results
+        
+        try:
+            results = self._parse_combined(text, list(analyses))
+            return dict(results, models=dict.fromkeys(results, answered_by)) if with_models else results
+        except ValueError as e:
+            # Don't keep serving an unusable response from cache (stored under the model that gave it)
+            self.llm_cache.invalidate(self.llm_cache.make_key(answered_by, system_prompt, prompt, max_tokens))
+            print(f"⚠️ Combined AI response unusable ({e}); falling back to per-section analyses")
+            if raise_errors:
+                futures = {
+                    key: self.llm_executor.submit(self._complete, *self._analysis_request(data, analysis_type),
+                                                  with_model=True)
+                    for key, (data, analysis_type) in analyses.items()
+                }
+                answers = {key: future.result() for key, future in futures.items()}
+                results = {key: text for key, (text, _) in answers.items()}
+                return dict(results, models={key: m for key, (_, m) in answers.items()}) if with_models else results
+            return self.generate_ai_analyses(analyses, timeout, with_models=with_models)
+    
+    def generate_ai_analysis(self, data, analysis_type):
+        """Generate AI-powered financial analysis"""
+        return self._complete(*self._analysis_request(data, analysis_type))
+    
+    def _complete(self, model, system_prompt, prompt, max_tokens, with_model=False):
+        """Cached, rate-limited, deadline-bounded chat completion
+        
+        With with_model, returns (text, model that answered): a hedge may be
+        answered by LLM_HEDGE_MODEL rather than the requested model.
+        """
+        estimate = self.rate_limiter.estimate_tokens(system_prompt, prompt, max_tokens=max_tokens)
+        
+        def request(model, timeout):
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                timeout=timeout
+            )
+            usage = getattr(response, 'usage', None)
+            return response.choices[0].message.content, getattr(usage, 'total_tokens', 0)
+        
+        # The caller waits for rate-limit capacity before each attempt, so
+        # neither the hedge timer nor the deadline race a queued request
+        return self.llm_cache.get_or_compute(
+            model, system_prompt, prompt, max_tokens,
+            lambda: self.llm_caller.call(request, model, limiter=self.rate_limiter, estimate=estimate),
+            with_model=with_model
+        )
+    
+    def generate_ai_analyses(self, analyses, timeout=None, with_models=False):
+        """Run independent AI analyses concurrently, keeping partial results on timeout
+        
+        with_models adds a 'models' entry naming the model that answered each
+        analysis (unavailable ones are left out).
+        """
+        timeout = self.llm_timeout if timeout is None else timeout
+        futures = {
+            key: self.llm_executor.submit(self._complete, *self._analysis_request(data, analysis_type),
+                                          with_model=True)
+            for key, (data, analysis_type) in analyses.items()
+        }
+        
+        deadline = time.monotonic() + timeout
+        results, models = {}, {}
+        for key, future in futures.items():
+            try:
+                results[key], models[key] = future.result(timeout=max(0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                print(f"⚠️ AI analysis '{key}' timed out after {timeout:.0f}s")
+                results[key] = f"AI analysis unavailable: timed out after {timeout:.0f} seconds."
+            except Exception as e:
+                print(f"❌ AI analysis '{key}' failed: {e}")
+                results[key] = f"AI analysis unavailable: {e}"
+        
+        return dict(results, models=models) if with_models else results
     
     def generate_predictions(self, data_type='revenue'):
         """Generate predictive analysis using machine learning"""
         if data_type == 'revenue':
-            data = self.execute_query('monthly_revenue')
+            data = self.execute_query('monthly_revenue', columnar=True)
             return self._forecast_revenue(data)
         elif data_type == 'expenses':
-            data = self.execute_query('expense_breakdown')
+            data = self.execute_query('expense_breakdown', columnar=True)
             return self._forecast_expenses(data)
         elif data_type == 'customers':
-            data = self.execute_query('customer_metrics')
+            data = self.execute_query('customer_metrics', columnar=True)
             return self._forecast_customers(data)
         else:
             return {'error': 'Invalid data type for prediction'}
     
+    def _to_frame(self, data):
+        """DataFrame for forecasting from a ColumnarResult (zero-copy) or row dicts"""
+        if isinstance(data, ColumnarResult):
+            return data.to_frame()
+        return pd.DataFrame(data)
+    
     def _forecast_revenue(self, revenue_data):
         """Forecast revenue using linear regression"""
         try:
             # Aggregate revenue by month
-            df = pd.DataFrame(revenue_data)
+            df = self._to_frame(revenue_data)
             df['month'] = pd.to_datetime(df['month'])
             monthly_totals = df.groupby('month')['revenue'].sum().reset_index()
             monthly_totals = monthly_totals.sort_values('month')
@@ -276,7 +743,7 @@ class RedshiftFinancialAgent:
     def _forecast_expenses(self, expense_data):
         """Forecast expenses using trend analysis"""
         try:
-            df = pd.DataFrame(expense_data)
+            df = self._to_frame(expense_data)
             df['month'] = pd.to_datetime(df['month'])
             monthly_totals = df.groupby('month')['total_expense'].sum().reset_index()
             monthly_totals = monthly_totals.sort_values('month')
@@ -315,7 +782,7 @@ class RedshiftFinancialAgent:
     def _forecast_customers(self, customer_data):
         """Forecast customer acquisition"""
         try:
-            df = pd.DataFrame(customer_data)
+            df = self._to_frame(customer_data)
             df['month'] = pd.to_datetime(df['month'])
             df = df.sort_values('month')
             
@@ -397,26 +864,17 @@ class RedshiftFinancialAgent:
         print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*80}")
         
-        revenue_forecast = self.generate_predictions('revenue')
-        expense_forecast = self.generate_predictions('expenses')
-        customer_forecast = self.generate_predictions('customers')
-        
         # Generate AI insights for predictions
         prediction_summary = {
-            'revenue_forecast': revenue_forecast,
-            'expense_forecast': expense_forecast,
-            'customer_forecast': customer_forecast
+            'revenue_forecast': self.generate_predictions('revenue'),
+            'expense_forecast': self.generate_predictions('expenses'),
+            'customer_forecast': self.generate_predictions('customers')
         }
         
         ai_prediction_insights = self.generate_ai_analysis(prediction_summary, "predictive analysis")
         
-        return {
-            'revenue_forecast': revenue_forecast,
-            'expense_forecast': expense_forecast,
-            'customer_forecast': customer_forecast,
-            'ai_insights': ai_prediction_insights,
-            'generated_at': datetime.now().isoformat()
-        }
+        return dict(prediction_summary, ai_insights=ai_prediction_insights,
+                    generated_at=datetime.now().isoformat())
     
     def create_comprehensive_report(self):
         """Generate comprehensive financial report from Redshift data"""
@@ -425,57 +883,130 @@ class RedshiftFinancialAgent:
         print(f"Generated by: {self.name} | Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*80}")
         
+        # Issue the independent section queries concurrently
+        section_data = self.execute_queries(self.report_queries, columnar=True)
+        report, analyses = self._prepare_report(section_data)
+        
+        return self._complete_report(report, self._report_insights(analyses))
+    
+    def _report_insights(self, analyses):
+        """The section analyses are independent, so dispatch them together"""
+        if self.combined_insights:
+            return self.generate_combined_analyses(analyses)
+        return self.generate_ai_analyses(analyses)
+    
+    def get_section(self, section, filters=None, fields=None, limit=None):
+        """One report section straight from Redshift, without any LLM calls
+        
+        fields keeps only the named columns and limit only the first rows;
+        the section total always covers every matching row. Time series
+        sections also report the granularity of their month column.
+        """
+        spec = REPORT_SECTIONS.get(section)
+        if spec is None:
+            raise ValueError(f"Unknown report section: {section}")
+        filters = normalize_filters(filters)
+        result = self.execute_query(spec['query'], columnar=True, filters=filters)
+        
+        total_column, total_name = spec['total']
+        total = result.sum(total_column) if total_column in result else 0
+        if fields and result.column_names:
+            unknown = [name for name in fields if name not in result]
+            if unknown:
+                raise ValueError(f"Unknown fields for {section}: {', '.join(unknown)} "
+                                 f"(available: {', '.join(result.column_names)})")
+            result = ColumnarResult({name: result[name] for name in fields})
+        row_count = len(result)
+        if limit:
+            result = result[:limit]
+        
+        section_result = {
+            spec['key']: result.to_records(),
+            total_name: total,
+            'row_count': row_count,
+            'generated_at': datetime.now().isoformat()
+        }
+        if TEMPLATE_SPECS[spec['query']]['time_series']:
+            section_result['granularity'] = filters.get('granularity', 'month')
+        return section_result
+    
+    def create_report_data(self):
+        """The report's data sections (no LLM calls) and the AI analyses they need"""
+        section_data = self.execute_queries(self.report_queries, columnar=True)
+        report, analyses = self._prepare_report(section_data)
+        return dict(report, generated_at=datetime.now().isoformat()), analyses
+    
+    def insight_tasks(self, analyses):
+        """(input_hash, keys, compute_fn) per insight job; compute_fn returns {key: analysis}
+        
+        The input hash is the LLM cache key of the job's prompt, so unchanged
+        data maps to the same job. Combined mode makes one job for every key.
+        compute_fn raises when the LLM fails, so the job is marked failed
+        (and retried) rather than finishing with placeholder text. Its result
+        also names the model that answered each key under 'models'.
+        """
+        if self.combined_insights:
+            request = self._combined_request(analyses)
+            return [(self.llm_cache.make_key(*request), list(analyses),
+                     lambda: self.generate_combined_analyses(analyses, raise_errors=True, with_models=True))]
+        
+        tasks = []
+        for key, (data, analysis_type) in analyses.items():
+            request = self._analysis_request(data, analysis_type)
+            tasks.append((self.llm_cache.make_key(*request), [key],
+                          lambda key=key, request=request: self._insight_result(key, request)))
+        return tasks
+    
+    def _insight_result(self, key, request):
+        text, answered_by = self._complete(*request, with_model=True)
+        return {key: text, 'models': {key: answered_by}}
+    
+    def generate_report_insights(self):
+        """Just the report's AI insights (revenue, expenses, executive summary)"""
+        section_data = self.execute_queries(self.report_queries, columnar=True)
+        _, analyses = self._prepare_report(section_data)
+        return dict(self._report_insights(analyses), generated_at=datetime.now().isoformat())
+    
+    def _prepare_report(self, section_data):
+        """Print the data sections; returns the report body and the AI analyses it needs"""
+        # Totals come straight from the column arrays; row dicts are only
+        # built once for printing, prompts and the returned report
+        total_revenue = section_data['monthly_revenue'].sum('revenue')
+        total_expenses = section_data['expense_breakdown'].sum('total_expense')
+        revenue_data = section_data['monthly_revenue'].to_records()
+        expense_data = section_data['expense_breakdown'].to_records()
+        customer_data = section_data['customer_metrics'].to_records()
+        product_data = section_data['product_performance'].to_records()
+        
         # 1. Revenue Analysis
         print(f"\n📊 REVENUE ANALYSIS")
         print("-" * 50)
-        revenue_data = self.execute_query('monthly_revenue')
-        
-        total_revenue = sum(r['revenue'] for r in revenue_data)
         print(f"Total Revenue (Last 3 months): ${total_revenue:,}")
         
         for item in revenue_data:
             print(f"{str(item['month'])[:7]}: ${item['revenue']:,} ({item['region']})")
         
-        revenue_insights = self.generate_ai_analysis(revenue_data, "revenue")
-        print(f"\n🤖 AI Insights - Revenue:")
-        print(revenue_insights)
-        
         # 2. Expense Analysis
         print(f"\n💰 EXPENSE ANALYSIS")
         print("-" * 50)
-        expense_data = self.execute_query('expense_breakdown')
-        
-        total_expenses = sum(e['total_expense'] for e in expense_data)
         print(f"Total Expenses (Last 3 months): ${total_expenses:,}")
         
         for item in expense_data:
             print(f"{str(item['month'])[:7]}: ${item['total_expense']:,} ({item['category']})")
         
-        expense_insights = self.generate_ai_analysis(expense_data, "expenses")
-        print(f"\n🤖 AI Insights - Expenses:")
-        print(expense_insights)
-        
         # 3. Customer Metrics
         print(f"\n👥 CUSTOMER METRICS")
         print("-" * 50)
-        customer_data = self.execute_query('customer_metrics')
-        
         for item in customer_data:
             print(f"{str(item['month'])[:7]}: {item['new_customers']} new customers | Avg LTV: ${item['avg_ltv']:,}")
         
         # 4. Product Performance
         print(f"\n🛍️ PRODUCT PERFORMANCE")
         print("-" * 50)
-        product_data = self.execute_query('product_performance')
-        
         for item in product_data:
             print(f"{item['product_category']}: {item['units_sold']:,} units | "
                   f"${item['total_revenue']:,} revenue | {item['avg_margin']:.1%} margin")
         
-        # 5. Executive Summary
-        print(f"\n🎯 EXECUTIVE SUMMARY")
-        print("-" * 50)
-        
         summary_data = {
             'total_revenue': total_revenue,
             'total_expenses': total_expenses,
@@ -485,22 +1016,33 @@ class RedshiftFinancialAgent:
             'top_products': product_data[:2]
         }
         
-        executive_summary = self.generate_ai_analysis(summary_data, "executive summary")
-        print(executive_summary)
-        
-        return {
+        report = {
             'revenue_data': revenue_data,
             'expense_data': expense_data,
             'customer_data': customer_data,
             'product_data': product_data,
-            'summary': summary_data,
-            'ai_insights': {
-                'revenue': revenue_insights,
-                'expenses': expense_insights,
-                'executive_summary': executive_summary
-            },
-            'generated_at': datetime.now().isoformat()
+            'summary': summary_data
         }
+        analyses = {
+            'revenue': (revenue_data, "revenue"),
+            'expenses': (expense_data, "expenses"),
+            'executive_summary': (summary_data, "executive summary")
+        }
+        return report, analyses
+    
+    def _complete_report(self, report, ai_insights):
+        """Print the AI insights and finish the report"""
+        print(f"\n🤖 AI Insights - Revenue:")
+        print(ai_insights['revenue'])
+        print(f"\n🤖 AI Insights - Expenses:")
+        print(ai_insights['expenses'])
+        
+        # 5. Executive Summary
+        print(f"\n🎯 EXECUTIVE SUMMARY")
+        print("-" * 50)
+        print(ai_insights['executive_summary'])
+        
+        return dict(report, ai_insights=ai_insights, generated_at=datetime.now().isoformat())
 
 # Usage example
 if __name__ == "__main__":
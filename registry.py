@@ -0,0 +1,16 @@
+import threading
+
+
+class Registry:
+    """Process-wide named instances, created on first use and shared by every caller"""
+
+    def __init__(self):
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, factory):
+        """The instance for name, built with factory() if this is the first request"""
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = factory()
+            return self._instances[name]
@@ -0,0 +1,346 @@
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import sqlite_store
+
+
+_LEASED = object()  # _fill(wait=False) result when another process holds the lease
+
+
+class RefreshSkipped(Exception):
+    """A background refresh left the key to another process that holds its lease"""
+
+
+class ResponseCache:
+    """Per-key API response cache with single-flight fills and stale-while-revalidate
+
+    Each key has its own value, timestamp and TTL. A miss computes the value
+    once while concurrent readers of the same key wait for that result;
+    readers of other keys are never blocked. An expired entry keeps being
+    served while a single background refresh replaces it.
+
+    With a path (API_CACHE_PATH), entries are also stored in SQLite so every
+    worker process serving the app shares them, and a per-key lease makes
+    one process compute while the others wait for or serve its result.
+    """
+
+    def __init__(self, ttl=None, max_workers=2, path=None, lease_timeout=None, max_entries=None):
+        self.ttl = ttl if ttl is not None else int(os.getenv('API_CACHE_TTL', '300'))
+        # Parameterized keys are open-ended; beyond this the oldest entries go
+        self.max_entries = max_entries or int(os.getenv('API_CACHE_MAX_ENTRIES', '256'))
+        self.path = path if path is not None else os.getenv('API_CACHE_PATH', 'api_cache.db')
+        # Longest a fill may take before another process takes over
+        self.lease_timeout = lease_timeout or int(os.getenv('API_CACHE_LEASE_TIMEOUT', '300'))
+        self.owner = f"{os.getpid()}:{id(self)}"
+
+        self._entries = {}   # key -> {'value', 'computed_at', 'ttl', 'duration'}
+        self._inflight = {}  # key -> Future
+        self._errors = {}    # key -> last refresh error message
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cache-refresh')
+
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'waits': 0, 'refreshes': 0,
+                       'refresh_errors': 0, 'shared_hits': 0}
+
+        self._db = None
+        if self.path:
+            self._db = sqlite_store.connect(self.path, """
+                CREATE TABLE IF NOT EXISTS api_cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    computed_at REAL NOT NULL,
+                    ttl REAL NOT NULL,
+                    duration REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS api_cache_leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+            """, label='Shared API cache', fallback='caching in this process only', wal=True)
+
+    def _fresh(self, entry, now):
+        return now - entry['computed_at'] < entry['ttl']
+
+    def _load_shared(self, key):
+        try:
+            with self._db_lock:
+                # Checked under the lock: close() may run concurrently
+                if self._db is None:
+                    return None
+                row = self._db.execute(
+                    "SELECT value, computed_at, ttl, duration FROM api_cache WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            return {'value': pickle.loads(row[0]), 'computed_at': row[1], 'ttl': row[2], 'duration': row[3]}
+        except (sqlite3.Error, pickle.PickleError) as e:
+            print(f"⚠️ Shared API cache read failed: {e}")
+            return None
+
+    def _save_shared(self, key, entry):
+        try:
+            blob = pickle.dumps(entry['value'], protocol=pickle.HIGHEST_PROTOCOL)
+            with self._db_lock:
+                if self._db is None:
+                    return
+                self._db.execute(
+                    "INSERT OR REPLACE INTO api_cache VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, entry['computed_at'], entry['ttl'], entry['duration'])
+                )
+                self._db.execute(
+                    "DELETE FROM api_cache WHERE key NOT IN "
+                    "(SELECT key FROM api_cache ORDER BY computed_at DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+                self._db.commit()
+        except (sqlite3.Error, pickle.PickleError) as e:
+            print(f"⚠️ Shared API cache write failed: {e}")
+
+    def _acquire_lease(self, key):
+        """True if this process may compute key (no other live lease)"""
+        now = time.time()
+        try:
+            with self._db_lock:
+                if self._db is None:
+                    return True
+                with sqlite_store.immediate(self._db) as db:
+                    row = db.execute("SELECT owner, expires_at FROM api_cache_leases WHERE key = ?", (key,)).fetchone()
+                    if row and row[0] != self.owner and row[1] > now:
+                        return False
+                    db.execute(
+                        "INSERT OR REPLACE INTO api_cache_leases VALUES (?, ?, ?)",
+                        (key, self.owner, now + self.lease_timeout)
+                    )
+                    return True
+        except sqlite3.Error as e:
+            print(f"⚠️ Shared API cache lease failed ({e}); computing locally")
+            return True
+
+    def _release_lease(self, key):
+        try:
+            with self._db_lock:
+                if self._db is None:
+                    return
+                self._db.execute("DELETE FROM api_cache_leases WHERE key = ? AND owner = ?", (key, self.owner))
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Shared API cache lease release failed: {e}")
+
+    def _current(self, key):
+        """Newest entry for key from this process or the shared store"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and self._fresh(entry, time.time()):
+            return entry
+        shared = self._load_shared(key)
+        if shared is not None and (entry is None or shared['computed_at'] > entry['computed_at']):
+            with self._lock:
+                self._entries[key] = shared
+                self._stats['shared_hits'] += 1
+                self._evict()
+            return shared
+        return entry
+
+    def get(self, key, compute_fn, ttl=None):
+        """Cached value for key, computing it with compute_fn() on a cold miss"""
+        entry = self._current(key)
+        with self._lock:
+            if entry is not None and self._fresh(entry, time.time()):
+                self._stats['hits'] += 1
+                return entry['value']
+
+            if entry is not None:
+                # Serve stale; at most one background refresh per key
+                self._stats['stale_hits'] += 1
+                if key not in self._inflight:
+                    self._start_refresh(key, compute_fn, ttl)
+                return entry['value']
+
+            self._stats['misses'] += 1
+        return self._compute(key, compute_fn, ttl)
+
+    def peek(self, key):
+        """Cached value for key, fresh or stale, without computing it (None if uncached)"""
+        entry = self._current(key)
+        return entry['value'] if entry is not None else None
+
+    def refresh(self, key, compute_fn, ttl=None):
+        """Recompute key now (joining a refresh already in flight)"""
+        return self._compute(key, compute_fn, ttl, force=True)
+
+    def touch(self, key):
+        """Restart an entry's TTL without recomputing it; False if the key is not cached"""
+        entry = self._current(key)
+        if entry is None:
+            return False
+        with self._lock:
+            entry = dict(entry, computed_at=time.time())
+            self._entries[key] = entry
+        self._save_shared(key, entry)
+        return True
+
+    def _compute(self, key, compute_fn, ttl, force=False):
+        """Single-flight fill: one caller computes, concurrent callers share its result"""
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = Future()
+                self._inflight[key] = pending
+                owner = True
+            else:
+                self._stats['waits'] += 1
+                owner = False
+
+        if not owner:
+            try:
+                return pending.result()
+            except RefreshSkipped:
+                if force:
+                    raise
+                # The joined background refresh deferred to another process; fill normally
+                return self._compute(key, compute_fn, ttl)
+
+        try:
+            value = self._fill(key, compute_fn, ttl, force)
+            pending.set_result(value)
+            return value
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _start_refresh(self, key, compute_fn, ttl):
+        """Submit a background refresh; caller holds the lock"""
+        self._inflight[key] = self._executor.submit(self._refresh, key, compute_fn, ttl)
+
+    def _refresh(self, key, compute_fn, ttl):
+        """Background refresh; errors (and deferring to another process) reach callers that joined it"""
+        try:
+            value = self._fill(key, compute_fn, ttl, wait=False)
+        except Exception as e:
+            # Keep serving the stale value; the next read past TTL retries
+            print(f"❌ Background refresh of '{key}' failed: {e}")
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+                self._errors[key] = str(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        if value is _LEASED:
+            raise RefreshSkipped(f"'{key}' is being refreshed by another process")
+        return value
+
+    def _fill(self, key, compute_fn, ttl, force=False, wait=True):
+        """Compute and store key, unless another process holds its lease
+
+        Then a cold caller (wait=True) polls until that process stores a value
+        or its lease lapses; a background refresh just leaves it to them.
+        """
+        started = time.time()
+        while not self._acquire_lease(key):
+            shared = self._load_shared(key)
+            if shared is not None and shared['computed_at'] >= started:
+                with self._lock:
+                    self._entries[key] = shared
+                    self._stats['shared_hits'] += 1
+                return shared['value']
+            if not wait:
+                return _LEASED
+            time.sleep(0.5)
+
+        try:
+            # Another worker may have refreshed it while we were deciding
+            shared = None if force else self._load_shared(key)
+            if shared is not None and self._fresh(shared, time.time()):
+                with self._lock:
+                    self._entries[key] = shared
+                    self._stats['shared_hits'] += 1
+                return shared['value']
+
+            start = time.time()
+            value = compute_fn()
+            entry = {
+                'value': value,
+                'computed_at': time.time(),
+                'ttl': self.ttl if ttl is None else ttl,
+                'duration': time.time() - start
+            }
+            with self._lock:
+                self._entries[key] = entry
+                self._stats['refreshes'] += 1
+                self._errors.pop(key, None)
+                self._evict()
+            self._save_shared(key, entry)
+        finally:
+            self._release_lease(key)
+        print(f"♻️ Cached '{key}' in {entry['duration']:.1f}s")
+        return value
+
+    def _evict(self):
+        """Drop the least recently computed entries over max_entries; caller holds the lock"""
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+        idle = sorted((entry['computed_at'], key) for key, entry in self._entries.items() if key not in self._inflight)
+        for _, key in idle[:excess]:
+            del self._entries[key]
+            self._errors.pop(key, None)
+
+    def remaining_ttl(self, key):
+        """Seconds until this process's entry for key goes stale (0 once expired or uncached)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return 0
+        return max(0, entry['ttl'] - (time.time() - entry['computed_at']))
+
+    def invalidate(self, key=None):
+        """Drop one key, or every key (in every process sharing the store)"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+        with self._db_lock:
+            if self._db is None:
+                return
+            if key is None:
+                self._db.execute("DELETE FROM api_cache")
+            else:
+                self._db.execute("DELETE FROM api_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self):
+        """Hit counters plus age, TTL, refresh state and last error per key"""
+        now = time.time()
+        with self._lock:
+            stats = dict(self._stats)
+            stats['shared'] = self._db is not None
+            stats['entries'] = {
+                key: {
+                    'age': now - entry['computed_at'],
+                    'ttl': entry['ttl'],
+                    'fresh': self._fresh(entry, now),
+                    'last_duration': entry['duration'],
+                    'refreshing': key in self._inflight,
+                    'last_error': self._errors.get(key)
+                }
+                for key, entry in self._entries.items()
+            }
+        return stats
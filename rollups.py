@@ -0,0 +1,102 @@
+"""Pre-aggregated rollup tables and the agent templates they can serve.
+
+Rollups are kept at day grain so routed queries reproduce the agents'
+rolling windows (CURRENT_DATE - INTERVAL ...) exactly; rolling them up to
+month or category is a scan over a few thousand rows instead of the raw
+fact tables.
+"""
+
+ROLLUP_LOG_TABLE = 'rollup_refresh_log'
+
+ROLLUP_LOG_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {ROLLUP_LOG_TABLE} (
+        rollup_name VARCHAR(100) NOT NULL,
+        refreshed_at TIMESTAMP NOT NULL,
+        source_rows BIGINT NOT NULL
+    );
+"""
+
+ROLLUP_TABLES = {
+    'rollup_daily_revenue': {
+        'source': 'sales_transactions',
+        'ddl': """
+            CREATE TABLE IF NOT EXISTS rollup_daily_revenue (
+                day DATE NOT NULL,
+                region VARCHAR(50) NOT NULL,
+                revenue DECIMAL(18,2) NOT NULL,
+                transaction_count BIGINT NOT NULL
+            )
+            DISTSTYLE ALL
+            SORTKEY (day);
+        """,
+        'refresh': """
+            INSERT INTO rollup_daily_revenue
+            SELECT transaction_date, region, SUM(amount), COUNT(*)
+            FROM sales_transactions
+            GROUP BY 1, 2;
+        """
+    },
+    'rollup_daily_expense': {
+        'source': 'expenses',
+        'ddl': """
+            CREATE TABLE IF NOT EXISTS rollup_daily_expense (
+                day DATE NOT NULL,
+                category VARCHAR(50) NOT NULL,
+                total_expense DECIMAL(18,2) NOT NULL,
+                expense_count BIGINT NOT NULL
+            )
+            DISTSTYLE ALL
+            SORTKEY (day);
+        """,
+        'refresh': """
+            INSERT INTO rollup_daily_expense
+            SELECT expense_date, category, SUM(amount), COUNT(*)
+            FROM expenses
+            GROUP BY 1, 2;
+        """
+    }
+}
+
+# Agent query templates answered from rollups (same columns and ordering).
+# Only templates whose measures are plain sums are routed, since those add up
+# exactly across days; averages (customer_metrics, product_performance) would
+# only approximate AVG's rounding, so they always read the raw tables.
+ROLLUP_ROUTES = {
+    'monthly_revenue': {
+        'rollup': 'rollup_daily_revenue',
+        'sql': """
+            SELECT
+                DATE_TRUNC('month', day) as month,
+                region,
+                SUM(revenue) as revenue
+            FROM rollup_daily_revenue
+            WHERE day >= CURRENT_DATE - INTERVAL '12 months'
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+        """
+    },
+    'expense_breakdown': {
+        'rollup': 'rollup_daily_expense',
+        'sql': """
+            SELECT
+                DATE_TRUNC('month', day) as month,
+                category,
+                SUM(total_expense) as total_expense
+            FROM rollup_daily_expense
+            WHERE day >= CURRENT_DATE - INTERVAL '12 months'
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+        """
+    }
+}
+
+
+def rollup_ages(conn):
+    """Seconds since each rollup was last refreshed, measured on the cluster clock"""
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT rollup_name, DATEDIFF(second, MAX(refreshed_at), GETDATE())
+            FROM {ROLLUP_LOG_TABLE}
+            GROUP BY 1
+        """)
+        return dict(cursor.fetchall())
@@ -1,11 +1,92 @@
 import psycopg2
 import os
+import time
+import argparse
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
-import random
+
+from rollups import ROLLUP_TABLES, ROLLUP_LOG_TABLE, ROLLUP_LOG_DDL
+from bulk_loader import BulkLoader
+from mock_data_generator import MockDataGenerator
 
 load_dotenv()
 
+# Physical design per table: (column, type, constraints, encoding), distribution
+# and sort key. Every agent query filters on the date column, so it leads the
+# sort key and is left RAW for zone-map pruning; low-cardinality text uses
+# BYTEDICT. No agent query joins these tables, so every table uses EVEN
+# distribution: rows spread evenly across slices for the date-range scans and
+# aggregations, with no risk of skew from a few busy customers.
+TABLE_DESIGNS = {
+    'sales_transactions': {
+        'columns': [
+            ('transaction_id', 'VARCHAR(50)', 'PRIMARY KEY', 'ZSTD'),
+            ('transaction_date', 'DATE', 'NOT NULL', 'RAW'),
+            ('region', 'VARCHAR(50)', 'NOT NULL', 'BYTEDICT'),
+            ('amount', 'DECIMAL(12,2)', 'NOT NULL', 'AZ64'),
+            ('customer_id', 'VARCHAR(50)', '', 'ZSTD'),
+            ('product_id', 'VARCHAR(50)', '', 'ZSTD')
+        ],
+        'diststyle': 'EVEN',
+        'sortkey': ['transaction_date', 'region']
+    },
+    'expenses': {
+        'columns': [
+            ('expense_id', 'VARCHAR(50)', 'PRIMARY KEY', 'ZSTD'),
+            ('expense_date', 'DATE', 'NOT NULL', 'RAW'),
+            ('category', 'VARCHAR(50)', 'NOT NULL', 'BYTEDICT'),
+            ('amount', 'DECIMAL(12,2)', 'NOT NULL', 'AZ64'),
+            ('description', 'VARCHAR(200)', '', 'ZSTD')
+        ],
+        'diststyle': 'EVEN',
+        'sortkey': ['expense_date', 'category']
+    },
+    'customers': {
+        'columns': [
+            ('customer_id', 'VARCHAR(50)', 'PRIMARY KEY', 'ZSTD'),
+            ('first_purchase_date', 'DATE', 'NOT NULL', 'RAW'),
+            ('lifetime_value', 'DECIMAL(12,2)', 'NOT NULL', 'AZ64'),
+            ('region', 'VARCHAR(50)', '', 'BYTEDICT')
+        ],
+        'diststyle': 'EVEN',
+        'sortkey': ['first_purchase_date']
+    },
+    'product_sales': {
+        'columns': [
+            ('sale_id', 'VARCHAR(50)', 'PRIMARY KEY', 'ZSTD'),
+            ('sale_date', 'DATE', 'NOT NULL', 'RAW'),
+            ('product_category', 'VARCHAR(50)', 'NOT NULL', 'BYTEDICT'),
+            ('quantity_sold', 'INTEGER', 'NOT NULL', 'AZ64'),
+            ('revenue', 'DECIMAL(12,2)', 'NOT NULL', 'AZ64'),
+            ('profit_margin', 'DECIMAL(5,4)', 'NOT NULL', 'AZ64')
+        ],
+        'diststyle': 'EVEN',
+        'sortkey': ['sale_date', 'product_category']
+    }
+}
+
+TABLE_COLUMNS = {
+    table: [column for column, _, _, _ in design['columns']]
+    for table, design in TABLE_DESIGNS.items()
+}
+
+
+def build_create_table(table, physical_design=True):
+    """CREATE TABLE statement for a table, with or without its physical design"""
+    design = TABLE_DESIGNS[table]
+    columns = ',\n    '.join(
+        ' '.join(filter(None, [
+            column, col_type, f"ENCODE {encoding}" if physical_design else None, constraints
+        ]))
+        for column, col_type, constraints, encoding in design['columns']
+    )
+    sql = f"CREATE TABLE {table} (\n    {columns}\n)"
+    if physical_design:
+        sql += f"\nDISTSTYLE {design['diststyle']}"
+        if design.get('distkey'):
+            sql += f"\nDISTKEY ({design['distkey']})"
+        sql += f"\nCOMPOUND SORTKEY ({', '.join(design['sortkey'])})"
+    return sql + ";"
+
 class RedshiftTableSetup:
     def __init__(self):
         self.redshift_config = {
@@ -25,7 +106,7 @@ class RedshiftTableSetup:
             print(f"Connection failed: {e}")
             return None
     
-    def create_tables(self):
+    def create_tables(self, physical_design=True):
         """Create all required tables"""
         conn = self.connect()
         if not conn:
@@ -42,48 +123,7 @@ class RedshiftTableSetup:
         ]
         
         # Create tables
-        create_queries = [
-            """
-            CREATE TABLE sales_transactions (
-                transaction_id VARCHAR(50) PRIMARY KEY,
-                transaction_date DATE NOT NULL,
-                region VARCHAR(50) NOT NULL,
-                amount DECIMAL(12,2) NOT NULL,
-                customer_id VARCHAR(50),
-                product_id VARCHAR(50)
-            );
-            """,
-            
-            """
-            CREATE TABLE expenses (
-                expense_id VARCHAR(50) PRIMARY KEY,
-                expense_date DATE NOT NULL,
-                category VARCHAR(50) NOT NULL,
-                amount DECIMAL(12,2) NOT NULL,
-                description VARCHAR(200)
-            );
-            """,
-            
-            """
-            CREATE TABLE customers (
-                customer_id VARCHAR(50) PRIMARY KEY,
-                first_purchase_date DATE NOT NULL,
-                lifetime_value DECIMAL(12,2) NOT NULL,
-                region VARCHAR(50)
-            );
-            """,
-            
-            """
-            CREATE TABLE product_sales (
-                sale_id VARCHAR(50) PRIMARY KEY,
-                sale_date DATE NOT NULL,
-                product_category VARCHAR(50) NOT NULL,
-                quantity_sold INTEGER NOT NULL,
-                revenue DECIMAL(12,2) NOT NULL,
-                profit_margin DECIMAL(5,4) NOT NULL
-            );
-            """
-        ]
+        create_queries = [build_create_table(table, physical_design) for table in TABLE_DESIGNS]
         
         try:
             # Drop existing tables
@@ -109,111 +149,181 @@ class RedshiftTableSetup:
             cursor.close()
             conn.close()
     
-    def populate_mock_data(self):
+    def populate_mock_data(self, scale_factor=1.0, seed=42):
         """Populate tables with mock data"""
+        print(f"📊 Generating mock data (scale factor {scale_factor:g})...")
+        generator = MockDataGenerator(scale_factor, seed=seed)
+        for table, rows in generator.row_counts.items():
+            print(f"  {table}: {rows:,} rows")
+        
+        # Rows are generated lazily in chunks while the loader consumes them
+        return self.load_data({table: generator.iter_rows(table) for table in TABLE_COLUMNS})
+    
+    def load_data(self, table_rows, batch_size=None, commit_rows=None):
+        """Bulk-load rows into the tables in parallel and report rows/second per table"""
+        loader = BulkLoader(self.connect, batch_size=batch_size, commit_rows=commit_rows)
+        print(f"🚚 Loading {len(table_rows)} tables in parallel "
+              f"({'S3 COPY' if loader.copy_enabled else f'{loader.batch_size}-row INSERT batches'})")
+        
+        results = loader.load_tables({
+            table: (TABLE_COLUMNS[table], rows) for table, rows in table_rows.items()
+        })
+        
+        if not all(stats['success'] for stats in results.values()):
+            print("❌ Error populating data")
+            return False
+        
+        print("🎉 All mock data inserted successfully!")
+        print("\n📈 Load Summary:")
+        for table, stats in results.items():
+            print(f"  {table}: {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+                  f"({stats['rows_per_second']:,.0f} rows/s)")
+        
+        # Show table counts
+        conn = self.connect()
+        if conn:
+            cursor = conn.cursor()
+            try:
+                print("\n📈 Table Summary:")
+                for table in table_rows:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                    count = cursor.fetchone()[0]
+                    print(f"  {table}: {count:,} records")
+            finally:
+                cursor.close()
+                conn.close()
+        
+        return True
+    
+    def analyze_and_vacuum(self, tables=None):
+        """Re-sort and refresh planner statistics after a load"""
         conn = self.connect()
         if not conn:
             return False
         
+        # VACUUM cannot run inside a transaction block
+        conn.autocommit = True
         cursor = conn.cursor()
         
         try:
-            # Generate sales transactions
-            print("📊 Generating sales transactions...")
-            regions = ['North America', 'Europe', 'Asia Pacific', 'Latin America']
-            
-            sales_data = []
-            for i in range(1000):
-                date = datetime.now() - timedelta(days=random.randint(1, 365))
-                region = random.choice(regions)
-                amount = round(random.uniform(100, 50000), 2)
-                sales_data.append((f'TXN_{i:04d}', date.date(), region, amount, f'CUST_{i%200:04d}', f'PROD_{i%50:03d}'))
-            
-            cursor.executemany(
-                "INSERT INTO sales_transactions VALUES (%s, %s, %s, %s, %s, %s)",
-                sales_data
-            )
-            print(f"✅ Inserted {len(sales_data)} sales transactions")
-            
-            # Generate expenses
-            print("💰 Generating expenses...")
-            categories = ['Operations', 'Marketing', 'R&D', 'HR', 'IT', 'Legal']
-            
-            expense_data = []
-            for i in range(500):
-                date = datetime.now() - timedelta(days=random.randint(1, 365))
-                category = random.choice(categories)
-                amount = round(random.uniform(1000, 100000), 2)
-                expense_data.append((f'EXP_{i:04d}', date.date(), category, amount, f'{category} expense {i}'))
-            
-            cursor.executemany(
-                "INSERT INTO expenses VALUES (%s, %s, %s, %s, %s)",
-                expense_data
-            )
-            print(f"✅ Inserted {len(expense_data)} expenses")
-            
-            # Generate customers
-            print("👥 Generating customers...")
-            customer_data = []
-            for i in range(200):
-                first_purchase = datetime.now() - timedelta(days=random.randint(30, 730))
-                ltv = round(random.uniform(500, 10000), 2)
-                region = random.choice(regions)
-                customer_data.append((f'CUST_{i:04d}', first_purchase.date(), ltv, region))
-            
-            cursor.executemany(
-                "INSERT INTO customers VALUES (%s, %s, %s, %s)",
-                customer_data
-            )
-            print(f"✅ Inserted {len(customer_data)} customers")
+            for table in tables or TABLE_DESIGNS:
+                start = time.time()
+                cursor.execute(f"VACUUM FULL {table} TO 100 PERCENT;")
+                cursor.execute(f"ANALYZE {table};")
+                print(f"✅ Vacuumed and analyzed {table} in {time.time() - start:.1f}s")
+            return True
             
-            # Generate product sales
-            print("🛍️ Generating product sales...")
-            categories = ['Electronics', 'Clothing', 'Home & Garden', 'Books', 'Sports', 'Beauty']
+        except Exception as e:
+            print(f"❌ Error during VACUUM/ANALYZE: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def report_table_health(self, tables=None):
+        """Print distribution skew, unsorted percentage and encoding per table"""
+        conn = self.connect()
+        if not conn:
+            return None
+        
+        tables = list(tables or TABLE_DESIGNS)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT "table", diststyle, sortkey1, encoded, tbl_rows, size,
+                       skew_rows, unsorted, stats_off
+                FROM svv_table_info
+                WHERE "table" IN %s
+                ORDER BY "table"
+            """, (tuple(tables),))
+            columns = [col[0] for col in cursor.description]
+            health = {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
             
-            product_data = []
-            for i in range(800):
-                date = datetime.now() - timedelta(days=random.randint(1, 90))
-                category = random.choice(categories)
-                quantity = random.randint(1, 100)
-                revenue = round(random.uniform(50, 5000), 2)
-                margin = round(random.uniform(0.1, 0.7), 4)
-                product_data.append((f'SALE_{i:04d}', date.date(), category, quantity, revenue, margin))
+            print("\n🩺 Table Health:")
+            for table, info in health.items():
+                print(f"  {table}: {info['tbl_rows'] or 0:,} rows | {info['size'] or 0:,} MB | "
+                      f"{info['diststyle']} | sortkey {info['sortkey1']} | encoded {info['encoded']} | "
+                      f"skew {info['skew_rows'] or 0:.2f} | unsorted {info['unsorted'] or 0:.1f}% | "
+                      f"stats off {info['stats_off'] or 0:.1f}%")
+            return health
             
-            cursor.executemany(
-                "INSERT INTO product_sales VALUES (%s, %s, %s, %s, %s, %s)",
-                product_data
-            )
-            print(f"✅ Inserted {len(product_data)} product sales")
+        except Exception as e:
+            print(f"❌ Error reading table health: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def create_rollups(self):
+        """Create the pre-aggregated rollup tables and refresh log"""
+        conn = self.connect()
+        if not conn:
+            return False
+        
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(ROLLUP_LOG_DDL)
+            for name, rollup in ROLLUP_TABLES.items():
+                cursor.execute(rollup['ddl'])
+                print(f"✅ Created rollup: {name}")
             
             conn.commit()
-            print("🎉 All mock data inserted successfully!")
+            return True
             
-            # Show table counts
-            tables = ['sales_transactions', 'expenses', 'customers', 'product_sales']
-            print("\n📈 Table Summary:")
-            for table in tables:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                count = cursor.fetchone()[0]
-                print(f"  {table}: {count:,} records")
+        except Exception as e:
+            print(f"❌ Error creating rollups: {e}")
+            conn.rollback()
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def refresh_rollups(self):
+        """Rebuild every rollup from its raw table and record the refresh time"""
+        conn = self.connect()
+        if not conn:
+            return False
+        
+        cursor = conn.cursor()
+        
+        try:
+            for name, rollup in ROLLUP_TABLES.items():
+                start = time.time()
+                
+                # Swap contents in one transaction so readers never see a partial rollup
+                cursor.execute(f"DELETE FROM {name};")
+                cursor.execute(rollup['refresh'])
+                rows = cursor.rowcount
+                cursor.execute(f"DELETE FROM {ROLLUP_LOG_TABLE} WHERE rollup_name = %s;", (name,))
+                cursor.execute(
+                    f"INSERT INTO {ROLLUP_LOG_TABLE} VALUES (%s, GETDATE(), "
+                    f"(SELECT COUNT(*) FROM {rollup['source']}));",
+                    (name,)
+                )
+                conn.commit()
+                print(f"✅ Refreshed {name}: {rows:,} rows in {time.time() - start:.1f}s")
             
             return True
             
         except Exception as e:
-            print(f"❌ Error populating data: {e}")
+            print(f"❌ Error refreshing rollups: {e}")
             conn.rollback()
             return False
         finally:
             cursor.close()
             conn.close()
     
-    def setup_complete_database(self):
+    def setup_complete_database(self, scale_factor=1.0):
         """Complete database setup"""
         print("🚀 Starting Redshift Database Setup")
         print("=" * 50)
         
         if self.create_tables():
-            if self.populate_mock_data():
+            if self.populate_mock_data(scale_factor) and self.create_rollups() and self.refresh_rollups():
+                self.analyze_and_vacuum()
+                self.report_table_health()
                 print("\n✅ Database setup completed successfully!")
                 print("Your RedshiftFinancialAgent is now ready to use!")
                 return True
@@ -222,5 +332,16 @@ class RedshiftTableSetup:
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and populate the Redshift financial tables")
+    parser.add_argument('--refresh-rollups', action='store_true',
+                        help="only refresh rollup tables (for scheduled jobs)")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="mock data scale factor (1 = 1000 sales, 500 expenses, 200 customers, 800 product sales)")
+    args = parser.parse_args()
+    
     setup = RedshiftTableSetup()
-    setup.setup_complete_database()
\ No newline at end of file
+    
+    if args.refresh_rollups:
+        setup.create_rollups() and setup.refresh_rollups()
+    else:
+        setup.setup_complete_database(args.scale)
\ No newline at end of file
@@ -0,0 +1,45 @@
+import sqlite3
+from contextlib import contextmanager
+
+
+def connect(path, schema, label=None, fallback='keeping it in memory', wal=False, migrate=None):
+    """Open a SQLite file shared by this process's threads and apply its schema
+
+    schema is a string of ;-separated statements; migrate(db) runs first for
+    stores that drop or alter tables left by older versions. With a label,
+    failures print a warning and return None so the caller can fall back;
+    without one they raise.
+    """
+    try:
+        # timeout is the busy timeout: wait up to 10s for another process's write lock
+        db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        if wal:
+            # WAL lets worker processes read while one of them writes
+            db.execute("PRAGMA journal_mode=WAL")
+        if migrate is not None:
+            migrate(db)
+        db.executescript(schema)
+        db.commit()
+        return db
+    except sqlite3.Error as e:
+        if label is None:
+            raise
+        print(f"⚠️ {label} unavailable ({e}); {fallback}")
+        return None
+
+
+@contextmanager
+def immediate(db):
+    """BEGIN IMMEDIATE transaction: committed on exit, rolled back on error
+
+    BEGIN IMMEDIATE takes SQLite's write lock up front, so a read-then-claim
+    inside the block is atomic across processes. The caller holds the lock
+    guarding db, so it can also check that db has not been closed.
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise